@@ -1,178 +1,51 @@
 from neo4j import GraphDatabase
-import json
+from corpus_io import iter_papers, count_papers
+from graph_loader import load_papers, LoadStats, Checkpoint, Quarantine, run_id
+from graph_schema import create_schema
 
 
 NEO4J_URI = "bolt://localhost:7687"  
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4j"  
 
+# dblp.json or the NDJSON output of PartA.1 (dblp.ndjson), read paper by paper
+INPUT_FILE = "dblp.json"
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-
-
-with open('dblp.json', 'r', encoding='utf-8') as file:
-    data = json.load(file)
-
-def paper_type_nodes_and_relationships(tx, paper):
-    info = paper["info"]
-
-    type = info.get("type")
-
-    if type == 'Journal':
-        tx.run(
-            """
-            MATCH (p:Paper {id:$paperid})
-            MERGE (j:Journal {id: $event_id,name: $name})
-            MERGE (p)-[:PUBLISHED_IN]->(j)
-            """,
-            paperid=info.get("paperid"),
-            event_id=info.get("eventid"),
-            name=info.get("event_name") 
-        )
-        tx.run(
-            """
-            MATCH (j:Journal {id:$eventid})
-            MERGE (v:Volumen {volumen: $edition, year: $year, city:$city})
-            MERGE (j)-[:IS_IN]->(v)
-            """,
-            eventid=info.get("eventid"),
-            edition=info.get("edition"),
-            year=info.get("year"),
-            city=info.get("city")
-        )
-    if type == 'Conference' or type == 'Workshop'  :
-        tx.run(
-            """
-            MATCH (p:Paper {id:$paperid})
-            MERGE (c:Conference {id: $event_id,name: $name})
-            MERGE (p)-[:PUBLISHED_IN]->(c)
-            """,
-            paperid=info.get("paperid"),
-            event_id=info.get("eventid"),
-            name=info.get("event_name") 
-        )
-        tx.run(
-            """
-            MATCH (c:Conference {id:$eventid})
-            MERGE (e:Edition {edition: $edition,year: $year,venue:$city})
-            MERGE (c)-[:BELONGS_TO]->(e)
-            """,
-            eventid=info.get("eventid"),
-            edition=info.get("edition"),
-            year=info.get("year"),
-            city=info.get("city")
-        )
-        
-             
-
+# Papers written per transaction, each kind of node and relationship is one UNWIND statement
+BATCH_SIZE = 1000
 
-def create_nodes_and_relationships(tx, paper):
-    info = paper["info"]
+# Sessions writing in parallel, use more than 1 only for an initial load into an empty database.
+# Parallel loads cannot be resumed: start them again on an empty database
+WORKERS = 1
 
-    authors = info.get("authors", {}).get("author", [])
-    reviewers = info.get("reviewers", {}).get("author", [])
+# Stages written in the same pass: "core" is this script's graph, "reviews" and "affiliations" are
+# the PartA.3A data. Drop them here to keep them for a separate PartA.3A run
+STAGES = ["core", "reviews", "affiliations"]
 
-    if isinstance(authors, dict):
-        authors = [authors]
+# Per-statement latency and counters of the run
+LOAD_REPORT = "load_report_A2.json"
 
+# Committed papers and citations, an interrupted load started again resumes from here
+CHECKPOINT_FILE = "checkpoint_A2.json"
 
-    main_author = authors[0] if authors else {"text": "unknown", "@pid": "0000"}
-    main_author_name = main_author["text"]
+# Records rejected by Neo4j, with the error, set aside while the rest of the batch is loaded
+QUARANTINE_FILE = "quarantine_A2.ndjson"
 
 
-    tx.run(
-        """
-        MERGE (p:Paper {id: $paperid, title: $title, type: $type,doi: $doi, main_author_name: $main_author_name, url: $url})
-        """,
-        paperid=info.get("paperid", 000),
-        title=info.get("title", 'default'),
-        doi=info.get("doi", 'default'),
-        url=info.get("url", 'default'),
-        type = info.get("type"),
-        main_author_name=main_author_name
-    ) 
-
-
-    tx.run(
-        """
-        MERGE (a:Author {id: $author_id})
-        ON CREATE SET a.name = $name 
-        WITH a 
-        MATCH (p:Paper {id: $paperid})
-        MERGE (p)-[:WRITTEN_BY {position: $position}]->(a)
-        """,
-        author_id=main_author.get("@pid", 0000),
-        name=main_author.get("text", 'default'),
-        paperid=info.get("paperid", 0000),
-        position=1
-    )
-
-    # Merge remaining Authors & Create Relationship with WITH Clause
-    for position, author in enumerate(authors[1:], start=2):
-        tx.run(
-            """
-            MERGE (a:Author {id: $author_id})
-            ON CREATE SET a.name = $name 
-            WITH a 
-            MATCH (p:Paper {id: $paperid})
-            MERGE (p)-[:WRITTEN_BY {position: $position}]->(a)
-            """,
-            author_id=author.get("@pid", 0000),
-            name=author.get("text", 'default'),
-            paperid=info.get("paperid", 0000),
-            position=position
-        )
-
-     
-    
-    for position, reviewer in enumerate(reviewers, start=1):
-        tx.run(
-             """
-            MERGE (r:Author {id: $reviewer_id})
-            ON CREATE SET r.name = $reviewer_name
-            WITH r
-            MATCH (p:Paper {id: $paperid})
-            MERGE (p)-[:REVIEWED_BY {position: $position}]->(r)
-            """,
-            reviewer_id=reviewer.get("@pid", 0000),
-            reviewer_name=reviewer.get("text", 'default'),
-            paperid=info.get("paperid", 0000),
-            position=position
-            )
-
-    
-
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
-    for cited_paper in info.get("cited", []):
-        tx.run(
-            """
-            MATCH (p1:Paper {id: $paperid})
-            MATCH (p2:Paper {id: $cited_id})
-            MERGE (p1)-[:CITES]->(p2)
-            """,
-            paperid=info.get("paperid", 'default'),
-            cited_id=cited_paper
-        )
-     
-    
-    for keyword in info.get("keywords", []):
-        tx.run(
-            """
-            MATCH (p:Paper {id:$paperid})
-            MERGE (k:Keyword {name: $keyword})
-            MERGE (p)-[:HAS_KEYWORD]->(k)
-            """,
-            keyword=keyword,
-            paperid=info.get("paperid")
-        ) 
-    paper_type_nodes_and_relationships(tx, paper)      
-  
 
 def main():
-    with driver.session() as session:
-        for paper in data["result"]["hits"].get("hit", []):
-            session.write_transaction(create_nodes_and_relationships, paper)
-    print("Data successfully imported into Neo4j!")
+    create_schema(driver)
+    quarantine = Quarantine(QUARANTINE_FILE)
+    stats = LoadStats("PartA.2", count_papers(INPUT_FILE))
+    checkpoint = Checkpoint(CHECKPOINT_FILE, run_id(INPUT_FILE, STAGES)) if WORKERS <= 1 else None
+    loaded = load_papers(driver, iter_papers(INPUT_FILE), BATCH_SIZE, workers=WORKERS, stats=stats, stages=STAGES,
+                         checkpoint=checkpoint, quarantine=quarantine)
+    stats.write_report(LOAD_REPORT)
+    if quarantine.count:
+        print(f"{quarantine.count} records could not be loaded, see {QUARANTINE_FILE}")
+    print(f"Data successfully imported into Neo4j! ({loaded} papers)")
 
 if __name__ == "__main__":
     main()
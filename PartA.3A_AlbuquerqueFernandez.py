@@ -1,81 +1,47 @@
 from neo4j import GraphDatabase
-import json
-import random
-from synthetic_data import *
+from corpus_io import iter_papers, count_papers
+from graph_loader import load_papers, LoadStats, Checkpoint, Quarantine, run_id
+from graph_schema import create_schema
 
 
 NEO4J_URI = "bolt://localhost:7687"  
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4j" 
 
+# dblp.json or the NDJSON output of PartA.1 (dblp.ndjson), read paper by paper
+INPUT_FILE = "dblp.json"
 
+# PartA.2 already writes these stages by default, run this script only if they were left out there
+STAGES = ["reviews", "affiliations"]
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# Papers written per transaction
+BATCH_SIZE = 1000
 
-def process_author(author):
-  
-    if isinstance(author, dict):
-        return author.get("@pid", f"unknown_{random.randint(1000,9999)}"), author.get("text", "Unknown Author")
-    return f"unknown_{random.randint(1000,9999)}", str(author)
+# Per-statement latency and counters of the run
+LOAD_REPORT = "load_report_A3A.json"
 
-def create_review_node(tx, paper):
-    info = paper["info"]
-    
+# Committed papers and citations, an interrupted load started again resumes from here
+CHECKPOINT_FILE = "checkpoint_A3A.json"
 
-    review_data = info.get("review", [])
-    if review_data and isinstance(review_data, list) and len(review_data) > 0:
-        review = review_data[0]
-        if all(key in review for key in ['score', 'main_feedback', 'decision']):
-            tx.run(
-                """
-                MATCH (p:Paper {id: $paperid})
-                MERGE (r:Review {
-                    score: $score,
-                    main_feedback: $feedback,
-                    decision: $decision
-                })
-                MERGE (p)-[:HAS]->(r)
-                """,
-                paperid=info.get("paperid"),
-                score=review.get("score"),
-                feedback=review.get("main_feedback"),
-                decision=review.get("decision")
-            )
+# Records rejected by Neo4j, with the error, set aside while the rest of the batch is loaded
+QUARANTINE_FILE = "quarantine_A3A.ndjson"
 
- 
-    authors = info.get("authors", {}).get("author", [])
-    if not isinstance(authors, list):
-        authors = [authors] if authors else []
-        
-    for author in authors:
-        author_id, author_name = process_author(author)
-        affiliation = random.choice(affiliations)
-        
-        tx.run(
-            """
-            MERGE (a:Author {id: $author_id})
-            ON CREATE SET a.name = $author_name
-            WITH a
-            MERGE (aff:Affiliation {name: $affiliation_name})
-            SET aff.type = $affiliation_type
-            MERGE (a)-[:AFFILIATED_WITH]->(aff)
-            """,
-            author_id=author_id,
-            author_name=author_name,
-            affiliation_name=affiliation["name"],
-            affiliation_type=affiliation["type"]
-        )
 
-def main():
 
-    with open('dblp.json', 'r', encoding='utf-8') as file:
-        data = json.load(file)
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+def main():
+    create_schema(driver)
 
-    with driver.session() as session:
-        for paper in data["result"]["hits"].get("hit", []):
-            session.write_transaction(create_review_node, paper)
-    print("Data successfully imported into Neo4j!")
+    quarantine = Quarantine(QUARANTINE_FILE)
+    stats = LoadStats("PartA.3A", count_papers(INPUT_FILE))
+    loaded = load_papers(driver, iter_papers(INPUT_FILE), BATCH_SIZE, stats=stats, stages=STAGES,
+                         checkpoint=Checkpoint(CHECKPOINT_FILE, run_id(INPUT_FILE, STAGES)), quarantine=quarantine)
+    stats.write_report(LOAD_REPORT)
+    if quarantine.count:
+        print(f"{quarantine.count} records could not be loaded, see {QUARANTINE_FILE}")
+    print(f"Data successfully imported into Neo4j! ({loaded} papers)")
 
 if __name__ == "__main__":
     main()
-    driver.close()
\ No newline at end of file
+    driver.close()
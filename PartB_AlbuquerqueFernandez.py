@@ -1,13 +1,18 @@
 from neo4j import GraphDatabase
+from query_cache import QueryCache
 import json
 
 NEO4J_URI = "bolt://localhost:7687"  
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4j"
 
+# Results are cached until the loaders change the graph; set a directory to keep them across runs
+QUERY_CACHE_DIR = None
+
 class Neo4jQueries:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, cache_dir=QUERY_CACHE_DIR):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.cache = QueryCache(directory=cache_dir)
 
     def close(self):
         self.driver.close()
@@ -16,9 +21,7 @@ class Neo4jQueries:
         with self.driver.session() as session:
             print(f"\nRunning {description}")
             try:
-                result = session.run(query, **kwargs)
-                records = [record for record in result]
-                return records
+                return self.cache.run(session, query, **kwargs)
             except Exception as e:
                 print(f" Error running query: {e}")
                 return None
@@ -26,9 +29,8 @@ class Neo4jQueries:
     def top_cited_papers(self):
         query = """
         MATCH (p:Paper)-[:PUBLISHED_IN]->(c:Conference)
-        WHERE p.type IN ['Conference', 'Workshop']
-        MATCH (p)-[:CITES]->(p1:Paper)
-        WITH c, p, COUNT(p1) AS citationCount
+        WHERE p.type IN ['Conference', 'Workshop'] AND p.referenceCount > 0
+        WITH c, p, p.referenceCount AS citationCount
         ORDER BY c.name, citationCount DESC
         WITH c, COLLECT({paper: p, citations: citationCount})[0..3] AS topPapers
         RETURN c.name AS eventName,
@@ -55,25 +57,21 @@ class Neo4jQueries:
 
     def journal_impact_factors(self):
         query = """
-        MATCH (p:Paper)-[:PUBLISHED_IN]-(j:Journal)
-        WHERE p.type = 'Journal'
-        OPTIONAL MATCH (p)-[:CITES]->(p1:Paper) 
-        WITH j,
-             COUNT(DISTINCT p) AS papers,
-             COUNT(p1) AS totalCitations
-        WHERE papers > 0     
+        MATCH (j:Journal)
+        WHERE j.paperCount > 0
         RETURN j.name AS journal_name,
-               totalCitations,
-               ToFloat(totalCitations)/papers AS impactFactor
+               j.referenceCount AS totalCitations,
+               ToFloat(j.referenceCount)/j.paperCount AS impactFactor
         ORDER BY impactFactor DESC
         """
         return self.run_query(query, "Query N3: Calculating journal impact factors")
 
     def author_h_index(self):
         query = """
-        MATCH (p1:Paper)<-[:CITES]-(p:Paper)-[:WRITTEN_BY]->(a:Author) 
-        WITH a, p, count(p1) AS citations
-        WITH a, p, citations
+        MATCH (p:Paper)-[:WRITTEN_BY]->(a:Author)
+        WHERE p.referenceCount > 0
+        WITH DISTINCT a, p
+        WITH a, p, p.referenceCount AS citations
         WITH a, count(p) AS total, collect(citations) AS paperCitations
         WITH a, total, paperCitations, 
              [x in range(1, size(paperCitations)) WHERE x <= paperCitations[x - 1] | [paperCitations[x - 1], x] ] AS hindex
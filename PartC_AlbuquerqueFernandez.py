@@ -1,14 +1,19 @@
 from neo4j import GraphDatabase
+from query_cache import QueryCache
 import json
 
 NEO4J_URI = "bolt://localhost:7687"  
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4j"   
 
+# Results are cached until the loaders change the graph; set a directory to keep them across runs
+QUERY_CACHE_DIR = None
+
 
 class Neo4jQueries:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, cache_dir=QUERY_CACHE_DIR):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.cache = QueryCache(directory=cache_dir)
 
     def close(self):
         self.driver.close()
@@ -17,8 +22,7 @@ class Neo4jQueries:
         with self.driver.session() as session:
             print(f"\nRunning  {description}")
             try:
-                result = session.run(query, **kwargs)
-                return [record for record in result]
+                return self.cache.run(session, query, **kwargs)
             except Exception as e:
                 print(f"Error running : {e}")
                 return None
@@ -84,9 +88,7 @@ class Neo4jQueries:
             MATCH (j:Journal)<-[:PUBLISHED_IN]-(p:Paper)-[:HAS_KEYWORD]->(k:Keyword)
             WHERE k.name IN ['Data Management', 'Indexing', 'Data Modeling', 'Big Data', 'Data Processing', 'Data Storage', 'Data Querying']
             WITH j, COUNT(p) AS db_papers
-            MATCH (j)<-[:PUBLISHED_IN]-(p2:Paper)
-            WITH j, db_papers, COUNT(p2) AS total_papers
-            WHERE (1.0 * db_papers / total_papers) >= 0.9
+            WHERE (1.0 * db_papers / j.paperCount) >= 0.9
             RETURN j AS venue
             
             UNION
@@ -95,9 +97,7 @@ class Neo4jQueries:
             MATCH (c:Conference)<-[:PUBLISHED_IN]-(p:Paper)-[:HAS_KEYWORD]->(k:Keyword)
             WHERE k.name IN ['Data Management', 'Indexing', 'Data Modeling', 'Big Data', 'Data Processing', 'Data Storage', 'Data Querying']
             WITH c, COUNT(p) AS db_papers
-            MATCH (c)<-[:PUBLISHED_IN]-(p2:Paper)
-            WITH c, db_papers, COUNT(p2) AS total_papers
-            WHERE (1.0 * db_papers / total_papers) >= 0.9
+            WHERE (1.0 * db_papers / c.paperCount) >= 0.9
             RETURN c AS venue
         }
         WITH COLLECT(venue) AS db_venues, comm
@@ -143,17 +143,13 @@ class Neo4jQueries:
             MATCH (j:Journal)<-[:PUBLISHED_IN]-(p:Paper)-[:HAS_KEYWORD]->(k:Keyword)
             WHERE k.name IN ['Data Management', 'Indexing', 'Data Modeling', 'Big Data', 'Data Processing', 'Data Storage', 'Data Querying']
             WITH j, COUNT(p) AS db_papers
-            MATCH (j)<-[:PUBLISHED_IN]-(p2:Paper)
-            WITH j, db_papers, COUNT(p2) AS total_papers
-            WHERE (1.0 * db_papers / total_papers) >= 0.9
+            WHERE (1.0 * db_papers / j.paperCount) >= 0.9
             RETURN j AS venue
             UNION
             MATCH (c:Conference)<-[:PUBLISHED_IN]-(p:Paper)-[:HAS_KEYWORD]->(k:Keyword)
             WHERE k.name IN ['Data Management', 'Indexing', 'Data Modeling', 'Big Data', 'Data Processing', 'Data Storage', 'Data Querying']
             WITH c, COUNT(p) AS db_papers
-            MATCH (c)<-[:PUBLISHED_IN]-(p2:Paper)
-            WITH c, db_papers, COUNT(p2) AS total_papers
-            WHERE (1.0 * db_papers / total_papers) >= 0.9
+            WHERE (1.0 * db_papers / c.paperCount) >= 0.9
             RETURN c AS venue
         }
         WITH COLLECT(venue) AS db_venues, comm
@@ -162,12 +158,12 @@ class Neo4jQueries:
         // Find papers with any citations (not just from community)
         UNWIND db_venues AS venue
         MATCH (venue)<-[:PUBLISHED_IN]-(paper:Paper)
-        WITH comm, paper, db_venues
-        MATCH (citedBy:Paper)-[:CITES]->(paper)
+        WHERE paper.citationCount > 0
+        WITH DISTINCT comm, paper
         WITH 
             comm,
             paper,
-            COUNT(citedBy) AS communityCitations
+            paper.citationCount AS communityCitations
         ORDER BY communityCitations DESC
         LIMIT 100
 
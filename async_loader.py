@@ -0,0 +1,219 @@
+"""
+async_loader.py
+
+Asyncio version of the batched loader of graph_loader.py, built on the async API of the Neo4j
+driver. It writes the same stages with the same UNWIND statements, but up to MAX_IN_FLIGHT batch
+transactions are open at once on the event loop, and the next batches are parsed and built in a
+worker thread while those transactions wait on the network.
+
+Only the network calls are written again here: the statements, the batch building, the retry and
+bisection policy, the checkpoint and the quarantine are the ones of graph_loader.py. If a batch
+fails for good the batches still in flight are cancelled.
+
+With more than one batch in flight the statements of a parallel load are used (see graph_loader.py),
+so like WORKERS > 1 in PartA.2 it refuses a graph that already has papers and cannot be resumed
+from a checkpoint. Running this file loads INPUT_FILE and writes a run report in the same
+format as PartA.2, to compare both paths.
+
+"""
+
+import asyncio
+import tempfile
+import time
+from collections import deque
+from itertools import count, islice
+
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import ClientError
+
+import graph_loader
+from corpus_io import iter_papers, count_papers
+from graph_loader import (
+    BATCH_SIZE, CITATION_BATCH_SIZE, STAGES, DIMENSION_STATEMENTS, EDITION_STATEMENTS, TRANSIENT_ERRORS,
+    PAPER_EXISTS_QUERY, PARALLEL_LOAD_ERROR,
+    LoadStats, batch_statements, batched, bisect, citation_split, citation_statement, citation_summary,
+    citation_timings, dimension_rows, edition_rows, paper_split, prepare_batches, quarantine_records,
+    read_citations, resume_papers, retry_wait, split_rows, stage_statements, statement_timing,
+)
+from graph_schema import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, SCHEMA, AWAIT_INDEXES, COUNTER_STATEMENTS
+from query_cache import BUMP_STATEMENT
+
+INPUT_FILE = "dblp.json"
+MAX_IN_FLIGHT = 4
+LOAD_REPORT = "load_report_async.json"
+
+
+async def run_timed(tx, kind, statement, **params):
+    start = time.perf_counter()
+    result = await tx.run(statement, **params)
+    records = [record async for record in result]
+    summary = await result.consume()
+    return records, statement_timing(kind, start, summary.counters, params)
+
+
+async def write_batch(tx, statements, rows, bump=False):
+    timings = []
+    for kind, statement, kind_rows in batch_statements(statements, rows):
+        _, timing = await run_timed(tx, kind, statement, rows=kind_rows)
+        timings.append(timing)
+    if bump:
+        timings.append((await run_timed(tx, "version", BUMP_STATEMENT))[1])
+    return timings
+
+
+# Transaction function writing the rows of one fixed list of statements
+def statements_writer(statements, bump=False):
+    async def write(tx, rows):
+        return await write_batch(tx, statements, rows, bump)
+    return write
+
+
+async def write_citations(tx, rows, statement, bump=False):
+    timings = citation_timings(*await run_timed(tx, "cites", statement, rows=rows))
+    if bump:
+        timings.append((await run_timed(tx, "version", BUMP_STATEMENT))[1])
+    return timings
+
+
+# Auto-commit statements: schema, citation counters and the graph version of a parallel load
+async def run_statements(driver, statements):
+    async with driver.session() as session:
+        for statement in statements:
+            await (await session.run(statement)).consume()
+
+
+async def commit(session, fn, batch):
+    for attempt in count():
+        try:
+            return await session.execute_write(fn, batch)
+        except TRANSIENT_ERRORS as e:
+            await asyncio.sleep(retry_wait(e, attempt, graph_loader.RETRIES, graph_loader.BACKOFF))
+
+
+async def commit_or_bisect(session, fn, batch, split, quarantine):
+    try:
+        return await commit(session, fn, batch)
+    except ClientError as e:
+        halves = bisect(e, batch, split, quarantine)
+    return [timing for half in halves for timing in await commit_or_bisect(session, fn, half, split, quarantine)]
+
+
+async def _write_in_session(driver, fn, batch, split=split_rows, quarantine=None):
+    async with driver.session() as session:
+        return await commit_or_bisect(session, fn, batch, split, quarantine)
+
+
+async def run_batches(driver, fn, batches, max_in_flight=MAX_IN_FLIGHT, split=split_rows, quarantine=None):
+    """Run fn(tx, batch) for every batch with at most max_in_flight open transactions.
+
+    The batches iterator is advanced in a worker thread so parsing overlaps the network waits.
+    Yields (batch, timings) in order; when a batch fails the ones in flight are cancelled.
+    """
+    pending = deque()
+    try:
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            pending.append((batch, asyncio.create_task(_write_in_session(driver, fn, batch, split, quarantine))))
+            if len(pending) >= max_in_flight:
+                done, task = pending.popleft()
+                yield done, await task
+        while pending:
+            done, task = pending.popleft()
+            yield done, await task
+    finally:
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+
+async def has_papers(driver):
+    async with driver.session() as session:
+        return await (await session.run(PAPER_EXISTS_QUERY)).single() is not None
+
+
+async def create_schema(driver):
+    await run_statements(driver, [*SCHEMA, AWAIT_INDEXES])
+
+
+async def load_citations(driver, citations, stats, batch_size=CITATION_BATCH_SIZE, max_in_flight=MAX_IN_FLIGHT,
+                         checkpoint=None, quarantine=None):
+    total = checkpoint.get("citations") if checkpoint else 0
+    dangling = missing = 0
+    quarantined = []
+    statement = citation_statement(max_in_flight)
+
+    async def write(tx, rows):
+        return await write_citations(tx, rows, statement, max_in_flight <= 1)
+
+    citations = batched(islice(citations, total, None), batch_size)
+    async for rows, timings in run_batches(driver, write, citations, max_in_flight, citation_split(quarantined),
+                                           quarantine):
+        stats.record(timings)
+        dangling += sum(timing[2].get("dangling", 0) for timing in timings)
+        missing += sum(timing[2].get("missing", 0) for timing in timings)
+        total += len(rows)
+        if checkpoint:
+            checkpoint.save("citations", total)
+    print(citation_summary(total, dangling, missing, len(quarantined)))
+    return total, dangling
+
+
+async def load_papers(driver, papers, batch_size=BATCH_SIZE, citation_batch_size=CITATION_BATCH_SIZE,
+                      max_in_flight=MAX_IN_FLIGHT, stats=None, stages=tuple(STAGES), checkpoint=None, quarantine=None):
+    """Same load as graph_loader.load_papers, with max_in_flight batches written concurrently."""
+    if checkpoint and max_in_flight > 1:
+        raise ValueError("A parallel load (max_in_flight > 1) cannot be resumed from a checkpoint")
+    if max_in_flight > 1 and await has_papers(driver):
+        raise ValueError(PARALLEL_LOAD_ERROR)
+    stats = stats or LoadStats("async")
+    statements = stage_statements(stages, max_in_flight)
+    editions = {kind: {} for kind, _ in EDITION_STATEMENTS} if max_in_flight > 1 else None
+    authors = set()
+    if max_in_flight > 1:
+        stats.record(await _write_in_session(driver, statements_writer(DIMENSION_STATEMENTS), dimension_rows()))
+
+    write_rows = statements_writer(statements, bump=max_in_flight <= 1)
+
+    async def write_papers(tx, batch):
+        return await write_rows(tx, batch[1])
+
+    quarantined = []
+    split = paper_split(stages, editions is not None, quarantined)
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+        papers = resume_papers(papers, checkpoint, stats, batch_size, stages, spool, editions, authors)
+        prepared = prepare_batches(papers, batch_size, stages, spool, editions, authors,
+                                   quarantine_records(quarantine, quarantined))
+        async for (_, _, read), timings in run_batches(driver, write_papers, prepared, max_in_flight, split, quarantine):
+            stats.record(timings)
+            stats.progress(read)
+            if checkpoint:
+                checkpoint.save("papers", stats.papers)
+
+        if "core" in stages:
+            if editions is not None:
+                stats.record(await _write_in_session(driver, statements_writer(EDITION_STATEMENTS), edition_rows(editions)))
+            await load_citations(driver, read_citations(spool), stats, citation_batch_size, max_in_flight,
+                                 checkpoint, quarantine)
+            if max_in_flight > 1:
+                await run_statements(driver, COUNTER_STATEMENTS)
+    if max_in_flight > 1:
+        await run_statements(driver, [BUMP_STATEMENT])
+    if checkpoint:
+        checkpoint.finish()
+    return stats.papers - len(quarantined)
+
+
+async def main():
+    async with AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) as driver:
+        await create_schema(driver)
+        stats = LoadStats("async", count_papers(INPUT_FILE))
+        loaded = await load_papers(driver, iter_papers(INPUT_FILE), stats=stats)
+        stats.write_report(LOAD_REPORT)
+        print(f"Data successfully imported into Neo4j! ({loaded} papers)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
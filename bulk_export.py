@@ -0,0 +1,169 @@
+"""
+bulk_export.py
+
+Exporter of the enriched corpus to the CSV files of the offline `neo4j-admin database import`
+tool, for first-time loads of large corpora. It builds the same graph as PartA.2 followed by
+PartA.3A: Paper, Author, Keyword, Journal, Conference, Edition, Volumen, Review and Affiliation
+nodes with their WRITTEN_BY, REVIEWED_BY, CITES, HAS_KEYWORD, PUBLISHED_IN, IS_IN, BELONGS_TO, HAS
+and AFFILIATED_WITH relationships.
+
+Papers are streamed one at a time. Only the keys of the shared nodes that PartA.2/PartA.3A MERGE
+(authors, keywords, venues, editions...) are remembered to write each node once; citations to papers missing
+from the corpus are left to `--skip-bad-relationships`, as the loader skips them too. The citation
+counters of papers and venues need every citation and are set after the import by graph_schema.py.
+
+"""
+
+import csv
+import os
+
+from corpus_io import iter_papers
+from graph_loader import as_list, author_affiliation, author_pids, edition_key
+
+INPUT_FILE = "dblp.json"
+EXPORT_DIR = "import"
+
+# file name -> (label or relationship type, header)
+NODE_FILES = {
+    "papers.csv": ("Paper", ["id:ID(Paper)", "title", "type", "doi", "main_author_name", "url"]),
+    "authors.csv": ("Author", ["id:ID(Author)", "name"]),
+    "keywords.csv": ("Keyword", ["name:ID(Keyword)"]),
+    "journals.csv": ("Journal", ["id:ID(Journal)", "name"]),
+    "conferences.csv": ("Conference", ["id:ID(Conference)", "name"]),
+    "volumes.csv": ("Volumen", ["id:ID(Volumen)", "volumen:int", "year", "city"]),
+    "editions.csv": ("Edition", ["id:ID(Edition)", "edition:int", "year", "venue"]),
+    "reviews.csv": ("Review", ["id:ID(Review)", "score:int", "main_feedback", "decision"]),
+    "affiliations.csv": ("Affiliation", ["name:ID(Affiliation)", "type"]),
+}
+
+RELATIONSHIP_FILES = {
+    "written_by.csv": ("WRITTEN_BY", [":START_ID(Paper)", "position:int", ":END_ID(Author)"]),
+    "reviewed_by.csv": ("REVIEWED_BY", [":START_ID(Paper)", "position:int", ":END_ID(Author)"]),
+    "cites.csv": ("CITES", [":START_ID(Paper)", ":END_ID(Paper)"]),
+    "has_keyword.csv": ("HAS_KEYWORD", [":START_ID(Paper)", ":END_ID(Keyword)"]),
+    "published_in_journal.csv": ("PUBLISHED_IN", [":START_ID(Paper)", ":END_ID(Journal)"]),
+    "published_in_conference.csv": ("PUBLISHED_IN", [":START_ID(Paper)", ":END_ID(Conference)"]),
+    "is_in.csv": ("IS_IN", [":START_ID(Journal)", ":END_ID(Volumen)"]),
+    "belongs_to.csv": ("BELONGS_TO", [":START_ID(Conference)", ":END_ID(Edition)"]),
+    "has.csv": ("HAS", [":START_ID(Paper)", ":END_ID(Review)"]),
+    "affiliated_with.csv": ("AFFILIATED_WITH", [":START_ID(Author)", ":END_ID(Affiliation)"]),
+}
+
+
+class CsvExport:
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self.writers = {}
+        self.seen = {}
+        os.makedirs(directory, exist_ok=True)
+        for name, (_, header) in {**NODE_FILES, **RELATIONSHIP_FILES}.items():
+            self.files[name] = open(os.path.join(directory, name), "w", encoding="utf-8", newline="")
+            self.writers[name] = csv.writer(self.files[name])
+            self.writers[name].writerow(header)
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+    def write(self, name, *row):
+        self.writers[name].writerow(row)
+
+    # Rows of MERGEd shared nodes and their relationships are only written the first time their key
+    # shows up; the relationships of a paper are deduplicated within the paper instead
+    def write_once(self, name, key, *row):
+        seen = self.seen.setdefault(name, set())
+        if key not in seen:
+            seen.add(key)
+            self.writers[name].writerow(row)
+
+    def author(self, author, author_id):
+        self.write_once("authors.csv", author_id, author_id, author.get("text", 'default'))
+        return author_id
+
+    def paper(self, info):
+        paperid = info.get("paperid", 000)
+        authors = as_list(info.get("authors", {}).get("author", []))
+        author_ids = author_pids(authors)
+        reviewers = as_list(info.get("reviewers", {}).get("author", []))
+        self.write("papers.csv", paperid, info.get("title", 'default'), info.get("type"),
+                   info.get("doi", 'default'), authors[0].get("text", "") if authors else "", info.get("url", 'default'))
+
+        # PartA.2
+        # Positions are unique within a paper, so these relationships never repeat
+        for position, (author, author_id) in enumerate(zip(authors, author_ids), start=1):
+            self.write("written_by.csv", paperid, position, self.author(author, author_id))
+
+        for position, (reviewer, reviewer_id) in enumerate(zip(reviewers, author_pids(reviewers)), start=1):
+            self.write("reviewed_by.csv", paperid, position, self.author(reviewer, reviewer_id))
+
+        for cited_paper in dict.fromkeys(info.get("cited", [])):
+            self.write("cites.csv", paperid, cited_paper)
+
+        for keyword in dict.fromkeys(info.get("keywords", [])):
+            self.write_once("keywords.csv", keyword, keyword)
+            self.write("has_keyword.csv", paperid, keyword)
+
+        self.venue(info, paperid)
+
+        # PartA.3A
+        review_data = info.get("review", [])
+        if review_data and isinstance(review_data, list):
+            review = review_data[0]
+            if all(key in review for key in ['score', 'main_feedback', 'decision']):
+                # One Review per paper, with the id of the paper
+                self.write("reviews.csv", paperid, review["score"], review["main_feedback"], review["decision"])
+                self.write("has.csv", paperid, paperid)
+
+        for author, author_id in zip(authors, author_ids):
+            # One affiliation per author, the same one the loader writes
+            affiliation = author_affiliation(author_id)
+            self.write_once("affiliations.csv", affiliation["name"], affiliation["name"], affiliation["type"])
+            self.write_once("affiliated_with.csv", author_id, author_id, affiliation["name"])
+
+    def venue(self, info, paperid):
+        eventid = info.get("eventid")
+        edition, year, city = info.get("edition"), info.get("year"), info.get("city")
+        key = edition_key(eventid, edition, year)
+
+        if info.get("type") == 'Journal':
+            self.write_once("journals.csv", eventid, eventid, info.get("event_name"))
+            self.write("published_in_journal.csv", paperid, eventid)
+            self.write_once("volumes.csv", key, key, edition, year, city)
+            self.write_once("is_in.csv", (eventid, key), eventid, key)
+        if info.get("type") in ('Conference', 'Workshop'):
+            self.write_once("conferences.csv", eventid, eventid, info.get("event_name"))
+            self.write("published_in_conference.csv", paperid, eventid)
+            self.write_once("editions.csv", key, key, edition, year, city)
+            self.write_once("belongs_to.csv", (eventid, key), eventid, key)
+
+
+def export(papers, directory=EXPORT_DIR):
+    """Write the CSV files of all papers into directory, returns the number of papers."""
+    exporter = CsvExport(directory)
+    count = 0
+    try:
+        for paper in papers:
+            exporter.paper(paper["info"])
+            count += 1
+    finally:
+        exporter.close()
+    return count
+
+
+def import_command(directory=EXPORT_DIR, database="neo4j"):
+    arguments = [f"--nodes={label}={os.path.join(directory, name)}" for name, (label, _) in NODE_FILES.items()]
+    arguments += [f"--relationships={kind}={os.path.join(directory, name)}" for name, (kind, _) in RELATIONSHIP_FILES.items()]
+    return " ".join(["neo4j-admin database import full", *arguments,
+                     "--skip-bad-relationships=true --skip-duplicate-nodes=true", database])
+
+
+def main():
+    count = export(iter_papers(INPUT_FILE))
+    print(f"Exported {count} papers to {EXPORT_DIR}/, import them into a stopped database with:\n")
+    print(import_command())
+    print("\nthen set the citation counters of the imported papers and venues with `python graph_schema.py`")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+corpus_io.py
+
+Reading and writing of the enriched corpus. PartA.1 can write dblp.json (the DBLP response layout,
+result.hits.hit) or dblp.ndjson, with one enriched paper per line written as soon as it is produced.
+The loaders read both formats through iter_papers, one paper at a time: dblp.json is walked down
+to result.hits.hit by a small incremental parser and only one hit is decoded and held at a time,
+so memory does not grow with the corpus.
+
+PaperSpool keeps the raw papers of a harvest in a temporary NDJSON file, so PartA.1 can read them
+back during the enrichment instead of holding them all in memory.
+
+"""
+
+import json
+import os
+import tempfile
+
+READ_SIZE = 1 << 16
+HITS_PATH = ("result", "hits", "hit")
+NUMBER_CHARACTERS = "0123456789+-.eE"
+
+
+def is_ndjson(path):
+    return path.endswith(".ndjson") or path.endswith(".jsonl")
+
+
+# Write the papers one per line as they come out of the iterator, returns how many were written
+def write_ndjson(papers, path):
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for paper in papers:
+            file.write(json.dumps(paper, ensure_ascii=False))
+            file.write("\n")
+            count += 1
+    return count
+
+
+# Write the DBLP response layout one hit at a time, the total goes after the hits once it is known
+def write_json(papers, path, query=None):
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{\n    "result": {\n        "query": %s,\n        "hits": {\n            "hit": [' % json.dumps(query))
+        for paper in papers:
+            file.write(",\n" if count else "\n")
+            file.write(json.dumps(paper, indent=4))
+            count += 1
+        file.write('\n            ],\n            "@total": "%d"\n        }\n    }\n}\n' % count)
+    return count
+
+
+# Write to a temporary file first so a crash never leaves a truncated file behind
+def write_atomic(path, content):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    if isinstance(content, bytes):
+        with open(temporary, "wb") as file:
+            file.write(content)
+    else:
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(content)
+    os.replace(temporary, path)
+
+
+def write_papers(papers, path, query=None):
+    if is_ndjson(path):
+        return write_ndjson(papers, path)
+    return write_json(papers, path, query)
+
+
+# Number of papers of an NDJSON file without parsing it, None for dblp.json
+def count_papers(path):
+    if not is_ndjson(path):
+        return None
+    with open(path, "rb") as file:
+        return sum(1 for line in file if line.strip())
+
+
+class PaperSpool:
+    """Temporary NDJSON file of papers, read back in order as many times as needed (one reader at a time)."""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.count = 0
+
+    def extend(self, papers):
+        # A reader may have left the position anywhere
+        self.file.seek(0, os.SEEK_END)
+        for paper in papers:
+            self.file.write(json.dumps(paper, ensure_ascii=False))
+            self.file.write("\n")
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        self.file.seek(0)
+        for line in self.file:
+            yield json.loads(line)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonStream:
+    """Incremental reader of one JSON document: decodes one value at a time from a sliding buffer."""
+
+    def __init__(self, file, read_size=READ_SIZE):
+        self.file = file
+        self.read_size = read_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.file.read(self.read_size)
+        self.eof = not chunk
+        # Drop what was already decoded so the buffer holds at most one value plus a chunk
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return not self.eof
+
+    def peek(self):
+        """Next non-whitespace character, consumed only by next() or value()."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def next(self, expected):
+        character = self.peek()
+        if character not in expected:
+            raise ValueError(f"Expected one of {expected!r} but found {character!r} at offset {self.position}")
+        self.position += 1
+        return character
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number cut by the end of the buffer ("12", "1." or "1e") may go on in the next chunk
+                if self.eof or (end < len(self.buffer) and self.buffer[end] not in NUMBER_CHARACTERS):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_array(stream, path):
+    """Yield the elements of the array at path (a tuple of object keys), skipping everything else."""
+    if not path:
+        stream.next("[")
+        if stream.peek() == "]":
+            return
+        while True:
+            yield stream.value()
+            if stream.next(",]") == "]":
+                return
+
+    stream.next("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.next(":")
+        if key == path[0]:
+            yield from iter_json_array(stream, path[1:])
+            return
+        stream.value()
+        if stream.next(",}") == "}":
+            return
+
+
+# Yield the papers of dblp.json or dblp.ndjson
+def iter_papers(path):
+    if is_ndjson(path):
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, "r", encoding="utf-8") as file:
+            yield from iter_json_array(JsonStream(file), HITS_PATH)
@@ -0,0 +1,126 @@
+"""
+dblp_harvest.py
+
+Paginated harvester for the dblp.org publication search API. The result list is walked with the
+`f=` offset parameter through a pooled HTTP session, with a bounded number of pages in flight at
+a time. Pages are handed back in offset order as soon as they arrive; PartA.1 appends each one to
+a spool file on disk and drops it, so the raw pages are never all held in memory. The enrichment
+starts once the last page is in, because its samplers draw from the whole corpus.
+
+Pages can be kept in an on-disk cache keyed by query, offset and hit count. In "record" mode missing
+pages are downloaded and stored, in "replay" mode the network is never used.
+
+"""
+
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from corpus_io import write_atomic
+
+DBLP_API_URL = "https://dblp.org/search/publ/api"
+PAGE_SIZE = 1000
+MAX_WORKERS = 4
+
+
+class CacheMissError(LookupError):
+    pass
+
+
+class ResponseCache:
+    """Content-addressed store of raw DBLP response pages."""
+
+    def __init__(self, directory, mode="record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+
+    def path(self, query, offset, hits):
+        digest = hashlib.sha256(json.dumps([query, offset, hits]).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".json")
+
+    def get(self, query, offset, hits):
+        try:
+            with open(self.path(query, offset, hits), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            if self.mode == "replay":
+                raise CacheMissError(f"Page offset={offset} hits={hits} of '{query}' is not cached")
+            return None
+
+    def put(self, query, offset, hits, content):
+        path = self.path(query, offset, hits)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, content)
+
+
+# Session with a connection pool sized for the worker threads and retries on throttling
+def create_session(pool_size=MAX_WORKERS, retries=3):
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Download (or read from the cache) one result page and return its "hits" object
+def fetch_page(session, query, offset, hits, url=DBLP_API_URL, cache=None):
+    content = cache.get(query, offset, hits) if cache is not None else None
+    if content is None:
+        params = {"q": query, "h": hits, "f": offset, "format": "json"}
+        response = session.get(url, params=params, timeout=60)
+        response.raise_for_status()
+        content = response.content
+        if cache is not None:
+            cache.put(query, offset, hits, content)
+    return json.loads(content)["result"]["hits"]
+
+
+def harvest(query, max_hits, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, url=DBLP_API_URL, session=None, cache=None):
+    """Yield the list of hits of every result page, in offset order, until max_hits or the end of the results."""
+    own_session = session is None and not (cache is not None and cache.mode == "replay")
+    if own_session:
+        session = create_session(max_workers)
+
+    limit = max_hits
+    next_offset = 0
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit_next():
+        nonlocal next_offset
+        if next_offset < limit:
+            size = min(page_size, limit - next_offset)
+            pending.append((size, executor.submit(fetch_page, session, query, next_offset, size, url, cache)))
+            next_offset += size
+
+    try:
+        for _ in range(max_workers):
+            submit_next()
+
+        while pending:
+            size, future = pending.popleft()
+            page = future.result()
+            hits = page.get("hit", [])
+
+            # The first page tells us how many results exist in total
+            total = int(page.get("@total", limit))
+            limit = min(limit, total)
+
+            if hits:
+                yield hits
+            if len(hits) < size:
+                break
+            submit_next()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if own_session:
+            session.close()
@@ -0,0 +1,417 @@
+"""
+enrichment.py
+
+Helpers used by PartA.1 to enrich the papers downloaded from dblp.org with synthetic data. The
+samplers are built once over the whole corpus, so enriching a paper only costs a handful of
+random draws instead of a scan over every other paper.
+
+Authors without a DBLP pid get a canonical id from AuthorResolver, so every loader sees one stable
+@pid per person instead of a shared "unknown" placeholder.
+
+"""
+
+import hashlib
+import json
+import os
+import random
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from corpus_io import PaperSpool, iter_papers, is_ndjson, write_papers
+from synthetic_data import keyword_list, paper_reviews, affiliations, batch_enrichment
+
+DBLP_RECORD_URL = "https://dblp.org/rec/"
+
+
+# DBLP returns a single author as a dict and several authors as a list
+def paper_authors(info):
+    authors = info.get("authors", {}).get("author", [])
+    if isinstance(authors, dict):
+        authors = [authors]
+    return authors
+
+
+# Handle any escaped unicode characters properly, keep the original text if decoding fails
+def decode_author_text(text):
+    if isinstance(text, str):
+        try:
+            return text.encode('utf-8').decode('unicode_escape')
+        except:
+            pass
+    return text
+
+
+def author_names(info):
+    return {author.get("text", "") for author in paper_authors(info)}
+
+
+def normalize_name(text):
+    return " ".join(str(decode_author_text(text)).casefold().split())
+
+
+# Hashed id of an author without a DBLP pid, from its name and the names of its co-authors
+def author_identity(name, coauthors=()):
+    return _identity(normalize_name(name), [normalize_name(coauthor) for coauthor in coauthors])
+
+
+def _identity(name, coauthors):
+    context = "|".join([name, *sorted(coauthors)])
+    return "h/" + hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+
+
+class AuthorResolver:
+    """Canonical @pid of every authorship of the corpus.
+
+    Authors with a DBLP pid keep it. The others are looked up by normalized name in an index of the
+    identities found so far and join the one that shares most co-authors with the paper (or the
+    only one, for a single-author paper); otherwise they start a new identity, with the hashed id
+    of author_identity. Unresolved authorships are handled in DBLP key order, so the ids do not
+    depend on the order of the harvest.
+
+    `previous` are the papers of an earlier enriched output: their identities are known before any
+    new authorship is resolved, and a paper that was already there keeps the ids it had, so adding
+    papers to the corpus never renames an existing author.
+    """
+
+    def __init__(self, papers, previous=()):
+        self.names = {}
+        self.coauthors = {}
+        self.ids_by_name = {}
+        self.resolved = []
+
+        normalized = {}
+
+        def names_of(authors):
+            names = []
+            for author in authors:
+                text = author.get("text", "")
+                if text not in normalized:
+                    normalized[text] = normalize_name(text)
+                names.append(normalized[text])
+            return names
+
+        # DBLP key -> {normalized name: hashed id} of the earlier output
+        known = {}
+        for paper in previous:
+            authors = paper_authors(paper["info"])
+            names = names_of(authors)
+            for position, author in enumerate(authors):
+                pid = author.get("@pid")
+                if pid:
+                    self.add(pid, author.get("text", ""), names[position], names[:position] + names[position + 1:])
+                    if pid.startswith("h/"):
+                        known.setdefault(paper_key(paper["info"]), {})[names[position]] = pid
+
+        pending = []
+        for index, paper in enumerate(papers):
+            authors = paper_authors(paper["info"])
+            names = names_of(authors)
+            kept = known.get(paper_key(paper["info"]), {})
+            self.resolved.append([author.get("@pid") or kept.get(name) for author, name in zip(authors, names)])
+            for position, author in enumerate(authors):
+                coauthors = names[:position] + names[position + 1:]
+                pid = self.resolved[index][position]
+                if pid:
+                    self.add(pid, author.get("text", ""), names[position], coauthors)
+                else:
+                    pending.append((paper_key(paper["info"]), index, position, author, names[position], coauthors))
+
+        for _, index, position, author, name, coauthors in sorted(pending, key=lambda item: item[:3]):
+            pid = self.match(name, coauthors) or _identity(name, coauthors)
+            self.add(pid, author.get("text", ""), name, coauthors)
+            self.resolved[index][position] = pid
+
+    def add(self, pid, text, name, coauthors):
+        if pid not in self.coauthors:
+            self.names[pid] = decode_author_text(text)
+            self.coauthors[pid] = set()
+            self.ids_by_name.setdefault(name, []).append(pid)
+        self.coauthors[pid].update(coauthors)
+
+    def match(self, name, coauthors):
+        candidates = self.ids_by_name.get(name, [])
+        if not coauthors:
+            return candidates[0] if len(candidates) == 1 else None
+        shared, pid = max(((len(self.coauthors[pid].intersection(coauthors)), pid) for pid in candidates),
+                          default=(0, None))
+        return pid if shared else None
+
+    def authors(self, index, info):
+        """The authors of paper `index` with their canonical @pid, in the shape DBLP gave them."""
+        resolved = [{**author, "@pid": pid} for author, pid in zip(paper_authors(info), self.resolved[index])]
+        if isinstance(info.get("authors", {}).get("author"), dict):
+            return resolved[0]
+        return resolved
+
+    def identities(self):
+        return [{"@pid": pid, "text": text} for pid, text in self.names.items()]
+
+
+# The DBLP record key identifies a paper across harvests
+def paper_key(info):
+    return info.get("key") or info.get("url") or info.get("title", "")
+
+
+# Stable paperid: the same DBLP record always gets the same id
+def paper_id_for_key(key):
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, DBLP_RECORD_URL + key))
+
+
+# Hash of the record as DBLP returned it, used to detect changed papers between harvests
+def source_hash(info):
+    return hashlib.sha256(json.dumps(info, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Every paper draws its synthetic data from its own seed, derived from its key
+def paper_seed(key):
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+class CitationSampler:
+    """Draws citation targets that share no author with the citing paper.
+
+    Only the author names of every paper are kept; a drawn candidate is rejected when it shares
+    one with the citing paper, so each draw costs a check over a few authors and prolific authors
+    never make a paper build an exclusion set of their whole output.
+    """
+
+    MAX_REJECTIONS = 50
+
+    def __init__(self, papers, paper_ids):
+        self.paper_ids = paper_ids
+        self.names = [frozenset(author_names(paper["info"])) for paper in papers]
+
+    def eligible(self, index, names, j):
+        return j != index and names.isdisjoint(self.names[j])
+
+    def sample(self, index, names, max_citations=5, rng=random):
+        total = len(self.paper_ids)
+        names = frozenset(names)
+        count = rng.randint(1, max_citations)
+
+        chosen = []
+        seen = set()
+        rejections = 0
+        while len(chosen) < count and rejections < self.MAX_REJECTIONS:
+            j = rng.randrange(total)
+            if j in seen or not self.eligible(index, names, j):
+                rejections += 1
+                continue
+            seen.add(j)
+            chosen.append(j)
+
+        # Rejection keeps failing when most of the corpus shares an author: scan it once instead
+        if len(chosen) < count:
+            candidates = [j for j in range(total) if j not in seen and self.eligible(index, names, j)]
+            chosen += rng.sample(candidates, min(count - len(chosen), len(candidates)))
+        return [self.paper_ids[j] for j in chosen]
+
+
+class ReviewerSampler:
+    """Draws reviewers from the author pool, never one of the paper's own authors.
+
+    Built once over the author array; a paper only excludes its own few authors, matched on their
+    @pid since several identities can share a name, so the reviewers are drawn by rejection
+    sampling instead of filtering the whole pool.
+    """
+
+    def __init__(self, authors):
+        self.authors = list(authors)
+        self.pids = [author.get("@pid") for author in self.authors]
+        self.pid_counts = Counter(self.pids)
+
+    def sample(self, pids, count=3, rng=random):
+        total = len(self.authors)
+        pids = set(pids)
+        excluded = sum(self.pid_counts[pid] for pid in pids)
+
+        # Small pools: every eligible author becomes a reviewer
+        if total - excluded <= count:
+            return [author for author, pid in zip(self.authors, self.pids) if pid not in pids]
+
+        chosen = []
+        drawn = set()
+        while len(chosen) < count:
+            index = rng.randrange(total)
+            if index in drawn or self.pids[index] in pids:
+                continue
+            drawn.add(index)
+            chosen.append(self.authors[index])
+        return chosen
+
+
+def enrich_paper(paper, index, paper_id, citations, reviewer_sampler, rng, columns, row, resolver):
+    """Enrich one paper; columns are the batch_enrichment columns of its shard and row its position."""
+    info = paper["info"]
+    raw_hash = source_hash(info)
+
+    current_authors = author_names(info)
+
+    selected_reviewers = reviewer_sampler.sample(resolver.resolved[index], 3, rng=rng)
+    reviewers = selected_reviewers if len(selected_reviewers) > 1 else selected_reviewers[0] if selected_reviewers else {}
+
+    cited_papers = citations.sample(index, current_authors, rng=rng)
+
+    new_info = {}
+    for key, value in info.items():
+        new_info[key] = value
+        if key == "authors":
+            new_info[key] = {**value, "author": resolver.authors(index, info)}
+            new_info["paperid"] = paper_id
+    new_info.setdefault("paperid", paper_id)
+
+    new_info["keywords"] = [keyword_list[k] for k in columns["keywords"][row]]
+    new_info["reviewers"] = {"author": reviewers}
+    new_info["review"] = [paper_reviews[columns["review"][row]]]
+    new_info["affiliation"] = [affiliations[columns["affiliation"][row]]]
+    new_info["cited"] = cited_papers
+    new_info["type"] = columns["type"][row]
+    new_info["eventid"] = columns["eventid"][row]
+    new_info["event_name"] = columns["event_name"][row]
+    new_info["edition"] = int(columns["edition"][row])
+    new_info["city"] = columns["city"][row]
+    new_info["source_hash"] = raw_hash
+
+    return {**paper, "info": new_info}
+
+
+# State shared by the enrichment workers, set once per process
+_corpus = {}
+
+
+def _init_worker(paper_ids, citations, reviewer_sampler, resolver):
+    _corpus["paper_ids"] = paper_ids
+    _corpus["citations"] = citations
+    _corpus["reviewers"] = reviewer_sampler
+    _corpus["resolver"] = resolver
+
+
+def _enrich_shard(indices, papers):
+    paper_ids = _corpus["paper_ids"]
+    seeds = [paper_seed(paper_key(paper["info"])) for paper in papers]
+    columns = batch_enrichment([paper["info"].get("type") for paper in papers], np.array(seeds, dtype=np.uint64))
+    return [
+        enrich_paper(paper, i, paper_ids[i], _corpus["citations"], _corpus["reviewers"],
+                     random.Random(seed), columns, row, _corpus["resolver"])
+        for row, (i, paper, seed) in enumerate(zip(indices, papers, seeds))
+    ]
+
+
+# What the samplers need of a paper: its DBLP key and its authors
+def paper_skeleton(paper):
+    info = paper["info"]
+    return {"info": {"key": paper_key(info), "authors": info.get("authors", {})}}
+
+
+# (indices, papers) of every shard, read from the spool in order
+def spooled_shards(spool, indices, shard_size):
+    wanted = None if indices is None else set(indices)
+    shard = ([], [])
+    for index, paper in enumerate(spool):
+        if wanted is not None and index not in wanted:
+            continue
+        shard[0].append(index)
+        shard[1].append(paper)
+        if len(shard[0]) >= shard_size:
+            yield shard
+            shard = ([], [])
+    if shard[0]:
+        yield shard
+
+
+def enrich_corpus(papers, authors=None, workers=1, shard_size=1000, indices=None, previous=None):
+    """Yield the enriched papers in input order.
+
+    Each paper is seeded from its DBLP key and gets a uuid5 paperid, so the output is identical for
+    any number of workers. With workers > 1 the papers are enriched in shards on a process pool,
+    with at most two shards per worker in flight. `indices` (sorted) restricts the enrichment to
+    some of the papers, the samplers still cover the whole corpus. Reviewers are drawn from
+    `authors`, by default every resolved author identity of the corpus. `previous` is the path of
+    an earlier enriched output whose author ids are kept.
+
+    The raw papers are read from a PaperSpool (other iterables are spooled first): only the key and
+    authors of every paper are held to build the samplers, and the records themselves are read
+    back one shard at a time.
+    """
+    if not isinstance(papers, PaperSpool):
+        with PaperSpool() as spool:
+            spool.extend(papers)
+            yield from enrich_corpus(spool, authors, workers, shard_size, indices, previous)
+        return
+
+    skeletons = [paper_skeleton(paper) for paper in papers]
+    paper_ids = [paper_id_for_key(paper["info"]["key"]) for paper in skeletons]
+    citations = CitationSampler(skeletons, paper_ids)
+    resolver = AuthorResolver(skeletons, iter_papers(previous) if previous else ())
+    reviewer_sampler = ReviewerSampler(resolver.identities() if authors is None else authors)
+    del skeletons
+    shards = spooled_shards(papers, indices, shard_size)
+
+    if workers <= 1:
+        _init_worker(paper_ids, citations, reviewer_sampler, resolver)
+        try:
+            for shard in shards:
+                yield from _enrich_shard(*shard)
+        finally:
+            _corpus.clear()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(paper_ids, citations, reviewer_sampler, resolver)) as executor:
+        pending = deque()
+        for shard in shards:
+            pending.append(executor.submit(_enrich_shard, *shard))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            yield from pending.popleft().result()
+            shard = next(shards, None)
+            if shard is not None:
+                pending.append(executor.submit(_enrich_shard, *shard))
+
+
+def previous_hashes(path):
+    """DBLP key -> source hash of every paper of a previous enriched output (later lines win)."""
+    hashes = {}
+    for paper in iter_papers(path):
+        info = paper["info"]
+        hashes[paper_key(info)] = info.get("source_hash")
+    return hashes
+
+
+def changed_papers(papers, hashes):
+    """Indices of the harvested papers that are new or changed since the previous output, with their kind."""
+    changes = {}
+    for index, paper in enumerate(papers):
+        key = paper_key(paper["info"])
+        if key not in hashes:
+            changes[index] = "new"
+        elif hashes[key] != source_hash(paper["info"]):
+            changes[index] = "changed"
+    return changes
+
+
+def tag_changes(enriched, indices, changes):
+    for index, paper in zip(indices, enriched):
+        yield {**paper, "@delta": changes[index]}
+
+
+# Previous output without the papers of the delta, followed by the delta
+def merge_delta(previous_path, delta_path, output_path, query=None):
+    delta_keys = {paper_key(paper["info"]) for paper in iter_papers(delta_path)}
+
+    def merged():
+        for paper in iter_papers(previous_path):
+            if paper_key(paper["info"]) not in delta_keys:
+                yield paper
+        for paper in iter_papers(delta_path):
+            paper.pop("@delta", None)
+            yield paper
+
+    temporary = output_path + ".tmp" + (".ndjson" if is_ndjson(output_path) else ".json")
+    count = write_papers(merged(), temporary, query)
+    os.replace(temporary, output_path)
+    return count
@@ -0,0 +1,1015 @@
+"""
+graph_loader.py
+
+Batched loading of the enriched corpus into Neo4j. Instead of one transaction and 15-20 `tx.run`
+per paper, papers are grouped in batches of BATCH_SIZE and every kind of node or relationship is
+written with a single UNWIND statement per batch, so a batch costs a handful of round trips.
+
+The load has two phases. The first one writes every paper with its authors, reviewers, keywords
+and venue, and spools the citation pairs to a temporary file. The second one streams those pairs
+in batches of CITATION_BATCH_SIZE once all papers exist, so a citation to a paper loaded later is
+not lost, and counts the cited ids that match no paper at all.
+
+With workers > 1 the batches are written by a pool of threads, one session each. Every paper
+MERGEs the same few Keyword, Journal and Conference nodes, so those are created up front from the
+synthetic_data.py catalogs and the parallel statements only MATCH them and CREATE the relationships
+of the new papers; Edition and Volumen nodes (one per venue, edition and year) are collected while
+loading and written at the end by a single session. Review nodes belong to a single paper and are
+simply CREATEd. The rows of every batch are sorted so all transactions lock the shared nodes in
+the same order. This mode is for initial loads: it refuses a graph that already has papers.
+
+The graph is written by stages (STAGES): "core" is the graph of PartA.2, "reviews" and
+"affiliations" the Review and Affiliation data of PartA.3A. Each batch is parsed once and the rows
+of all the selected stages are written in the same transaction.
+
+Every statement is timed and its result summary counters are collected in LoadStats, which prints
+live progress (papers/s and ETA) and writes a JSON run report at the end.
+
+A Checkpoint file records how many papers (and then citations) are committed after every batch,
+so an interrupted load resumes where it stopped. Transient errors are retried with exponential
+backoff; a batch that fails on its data (DATA_ERRORS) is split in halves until the offending
+records are isolated, and those are written to a Quarantine NDJSON file instead of aborting the
+load, like the records too malformed to build their rows. Any other error stops the load.
+
+Every batch also bumps the graph version of query_cache.py in the batch transaction, so cached
+PartB/PartC results change exactly when the batch commits; a parallel load bumps it once, at the end.
+
+The loaders keep citation counters up to date as they write: citationCount (in-degree) and
+referenceCount (out-degree) on every Paper, and paperCount, citationCount and referenceCount (the
+totals of its papers) on every Journal and Conference, so PartB and PartC read them instead of
+counting CITES relationships. A parallel load leaves them out and counts them once at the end.
+
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count, islice
+
+from neo4j.exceptions import ClientError, ServiceUnavailable, SessionExpired, TransientError
+
+from corpus_io import write_atomic
+from enrichment import author_identity
+from graph_schema import count_citations
+from query_cache import BUMP_STATEMENT, bump_graph_version
+from synthetic_data import keyword_list, conferences, journals, workshops, affiliations
+
+BATCH_SIZE = 1000
+CITATION_BATCH_SIZE = 10000
+
+# Attempts of a batch on transient errors, on top of the driver's own retries, and first wait in seconds
+RETRIES = 5
+BACKOFF = 1.0
+
+TRANSIENT_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+# Codes of the errors caused by the records of a batch, the only ones worth bisecting: any other
+# error (a missing database or parameter, a statement the server does not support) stops the load
+DATA_ERRORS = {
+    "Neo.ClientError.Schema.ConstraintValidationFailed",
+    "Neo.ClientError.Statement.TypeError",
+    "Neo.ClientError.Statement.ArgumentError",
+    "Neo.ClientError.Statement.ArithmeticError",
+}
+# Errors raised while the rows of a malformed record (a field of an unexpected shape) are built
+RECORD_ERRORS = (AttributeError, KeyError, TypeError, ValueError)
+
+
+def as_list(value):
+    if isinstance(value, dict):
+        return [value] if value else []
+    return value or []
+
+
+def batched(papers, size=BATCH_SIZE):
+    batch = []
+    for paper in papers:
+        batch.append(paper)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Id of a Volumen or Edition: scoped to its venue, so each venue has its own editions
+def edition_key(eventid, edition, year):
+    return f"{eventid}|{edition}|{year}"
+
+
+# @pid of every author; files enriched before the author resolver get its hashed id for the ones without
+def author_pids(authors):
+    names = [author.get("text", "") for author in authors]
+    return [
+        author.get("@pid") or author_identity(names[i], names[:i] + names[i + 1:])
+        for i, author in enumerate(authors)
+    ]
+
+
+# Parameter lists of one batch, one list per statement of CORE_STATEMENTS, and the citations to spool
+def core_rows(papers):
+    rows = {kind: [] for kind, _ in CORE_STATEMENTS}
+    rows["cites"] = []
+    for paper in papers:
+        info = paper["info"]
+        paperid = info.get("paperid", 000)
+        authors = as_list(info.get("authors", {}).get("author", []))
+        reviewers = as_list(info.get("reviewers", {}).get("author", []))
+
+        if paper.get("@delta") == "changed":
+            rows["stale"].append({"paperid": paperid})
+
+        rows["papers"].append({
+            "paperid": paperid,
+            "title": info.get("title", 'default'),
+            "type": info.get("type"),
+            "doi": info.get("doi", 'default'),
+            "url": info.get("url", 'default'),
+            "main_author_name": authors[0].get("text") if authors else None,
+        })
+
+        for position, (author, author_id) in enumerate(zip(authors, author_pids(authors)), start=1):
+            rows["written_by"].append({
+                "paperid": paperid,
+                "author_id": author_id,
+                "name": author.get("text", 'default'),
+                "position": position,
+            })
+
+        for position, (reviewer, reviewer_id) in enumerate(zip(reviewers, author_pids(reviewers)), start=1):
+            rows["reviewed_by"].append({
+                "paperid": paperid,
+                "reviewer_id": reviewer_id,
+                "name": reviewer.get("text", 'default'),
+                "position": position,
+            })
+
+        for keyword in info.get("keywords", []):
+            rows["keywords"].append({"paperid": paperid, "keyword": keyword})
+
+        venue = {
+            "paperid": paperid,
+            "edition_id": edition_key(info.get("eventid"), info.get("edition"), info.get("year")),
+            "eventid": info.get("eventid"),
+            "name": info.get("event_name"),
+            "edition": info.get("edition"),
+            "year": info.get("year"),
+            "city": info.get("city"),
+        }
+        if info.get("type") == 'Journal':
+            rows["journals"].append(venue)
+        if info.get("type") in ('Conference', 'Workshop'):
+            rows["conferences"].append(venue)
+
+        for cited_paper in info.get("cited", []):
+            rows["cites"].append({"paperid": paperid, "cited_id": cited_paper})
+    return rows
+
+
+CORE_STATEMENTS = [
+    # A changed paper of a delta (PartA.1 previous_output) loses its old outgoing relationships,
+    # and the counters of the papers it cited and of its venues lose what they counted for them
+    ("stale", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        CALL {
+            WITH p
+            MATCH (p)-[:CITES]->(q:Paper)
+            SET q.citationCount = q.citationCount - 1
+            WITH q
+            MATCH (q)-[:PUBLISHED_IN]->(v)
+            SET v.citationCount = v.citationCount - 1
+        }
+        CALL {
+            WITH p
+            MATCH (p)-[:PUBLISHED_IN]->(v)
+            SET v.paperCount = v.paperCount - 1,
+                v.citationCount = v.citationCount - coalesce(p.citationCount, 0),
+                v.referenceCount = v.referenceCount - coalesce(p.referenceCount, 0)
+        }
+        SET p.referenceCount = 0
+        WITH p
+        MATCH (p)-[r:WRITTEN_BY|REVIEWED_BY|CITES|HAS_KEYWORD|PUBLISHED_IN]->()
+        DELETE r
+        """),
+    # New papers start with both counters at 0, so only papers loaded before the counters have none
+    ("papers", """
+        UNWIND $rows AS row
+        MERGE (p:Paper {id: row.paperid})
+        SET p.title = row.title, p.type = row.type, p.doi = row.doi,
+            p.main_author_name = row.main_author_name, p.url = row.url,
+            p.citationCount = coalesce(p.citationCount, 0), p.referenceCount = coalesce(p.referenceCount, 0)
+        """),
+    ("written_by", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (a:Author {id: row.author_id})
+        ON CREATE SET a.name = row.name
+        MERGE (p)-[:WRITTEN_BY {position: row.position}]->(a)
+        """),
+    ("reviewed_by", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (r:Author {id: row.reviewer_id})
+        ON CREATE SET r.name = row.name
+        MERGE (p)-[:REVIEWED_BY {position: row.position}]->(r)
+        """),
+    ("keywords", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (k:Keyword {name: row.keyword})
+        MERGE (p)-[:HAS_KEYWORD]->(k)
+        """),
+    ("journals", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (j:Journal {id: row.eventid, name: row.name})
+        MERGE (p)-[:PUBLISHED_IN]->(j)
+        ON CREATE SET j.paperCount = coalesce(j.paperCount, 0) + 1,
+                      j.citationCount = coalesce(j.citationCount, 0) + coalesce(p.citationCount, 0),
+                      j.referenceCount = coalesce(j.referenceCount, 0) + coalesce(p.referenceCount, 0)
+        MERGE (v:Volumen {id: row.edition_id})
+        ON CREATE SET v.volumen = row.edition, v.year = row.year, v.city = row.city
+        MERGE (j)-[:IS_IN]->(v)
+        """),
+    ("conferences", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (c:Conference {id: row.eventid, name: row.name})
+        MERGE (p)-[:PUBLISHED_IN]->(c)
+        ON CREATE SET c.paperCount = coalesce(c.paperCount, 0) + 1,
+                      c.citationCount = coalesce(c.citationCount, 0) + coalesce(p.citationCount, 0),
+                      c.referenceCount = coalesce(c.referenceCount, 0) + coalesce(p.referenceCount, 0)
+        MERGE (e:Edition {id: row.edition_id})
+        ON CREATE SET e.edition = row.edition, e.year = row.year, e.venue = row.city
+        MERGE (c)-[:BELONGS_TO]->(e)
+        """),
+]
+
+
+# Parameter lists of the REVIEW_STATEMENTS
+def review_rows(papers):
+    rows = {"reviews": []}
+    for paper in papers:
+        info = paper["info"]
+        review_data = info.get("review", [])
+        if review_data and isinstance(review_data, list):
+            review = review_data[0]
+            if all(key in review for key in ['score', 'main_feedback', 'decision']):
+                rows["reviews"].append({
+                    "paperid": info.get("paperid", 000),
+                    "score": review["score"],
+                    "feedback": review["main_feedback"],
+                    "decision": review["decision"],
+                })
+    return rows
+
+
+# Every paper has its own Review node, with the id of the paper
+REVIEW_STATEMENTS = [
+    ("reviews", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (r:Review {id: row.paperid})
+        SET r.score = row.score, r.main_feedback = row.feedback, r.decision = row.decision
+        MERGE (p)-[:HAS]->(r)
+        """),
+]
+
+
+# Catalog affiliation of an author, always the same one for the same author id
+def author_affiliation(author_id):
+    digest = hashlib.sha256(str(author_id).encode("utf-8")).digest()
+    return affiliations[int.from_bytes(digest[:8], "big") % len(affiliations)]
+
+
+# Parameter lists of the AFFILIATION_STATEMENTS, one row per distinct author of the batch
+def affiliation_rows(papers):
+    rows = {"affiliations": []}
+    seen = set()
+    for paper in papers:
+        for author_id in author_pids(as_list(paper["info"].get("authors", {}).get("author", []))):
+            if author_id in seen:
+                continue
+            seen.add(author_id)
+            affiliation = author_affiliation(author_id)
+            rows["affiliations"].append({
+                "author_id": author_id,
+                "affiliation": affiliation["name"],
+                "type": affiliation["type"],
+            })
+    return rows
+
+
+# The Author nodes already exist, written by the core stage of this or an earlier load
+AFFILIATION_STATEMENTS = [
+    ("affiliations", """
+        UNWIND $rows AS row
+        MATCH (a:Author {id: row.author_id})
+        MERGE (aff:Affiliation {name: row.affiliation})
+        SET aff.type = row.type
+        MERGE (a)-[:AFFILIATED_WITH]->(aff)
+        """),
+]
+
+
+# Shared nodes created once before a parallel load
+DIMENSION_STATEMENTS = [
+    ("keywords", """
+        UNWIND $rows AS name
+        MERGE (:Keyword {name: name})
+        """),
+    ("journals", """
+        UNWIND $rows AS row
+        MERGE (:Journal {id: row.id, name: row.name})
+        """),
+    ("conferences", """
+        UNWIND $rows AS row
+        MERGE (:Conference {id: row.id, name: row.name})
+        """),
+    ("affiliations", """
+        UNWIND $rows AS row
+        MERGE (aff:Affiliation {name: row.name})
+        SET aff.type = row.type
+        """),
+]
+
+
+def dimension_rows():
+    return {
+        "keywords": keyword_list,
+        "journals": [{"id": j["id"], "name": j["name"]} for j in journals],
+        "conferences": [{"id": c["id"], "name": c["name"]} for c in conferences + workshops],
+        "affiliations": affiliations,
+    }
+
+
+# Same graph as CORE_STATEMENTS, without MERGE on the shared nodes; Authors keep their MERGE.
+# Authors and reviewers are written by one statement whose rows are sorted by author id (see
+# batch_rows), so every transaction locks its Author nodes in the same order.
+# The venue counters are left alone, every transaction would wait on the lock of the same few venues
+PARALLEL_STATEMENTS = [
+    CORE_STATEMENTS[0],
+    # Without counters: count_citations sets them at the end on the papers that have none
+    ("papers", """
+        UNWIND $rows AS row
+        MERGE (p:Paper {id: row.paperid})
+        SET p.title = row.title, p.type = row.type, p.doi = row.doi,
+            p.main_author_name = row.main_author_name, p.url = row.url
+        """),
+    ("authors", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MERGE (a:Author {id: row.author_id})
+        ON CREATE SET a.name = row.name
+        FOREACH (_ IN CASE WHEN row.reviewer THEN [] ELSE [1] END |
+            CREATE (p)-[:WRITTEN_BY {position: row.position}]->(a))
+        FOREACH (_ IN CASE WHEN row.reviewer THEN [1] ELSE [] END |
+            CREATE (p)-[:REVIEWED_BY {position: row.position}]->(a))
+        """),
+    ("keywords", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MATCH (k:Keyword {name: row.keyword})
+        CREATE (p)-[:HAS_KEYWORD]->(k)
+        """),
+    ("journals", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MATCH (j:Journal {id: row.eventid})
+        CREATE (p)-[:PUBLISHED_IN]->(j)
+        """),
+    ("conferences", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        MATCH (c:Conference {id: row.eventid})
+        CREATE (p)-[:PUBLISHED_IN]->(c)
+        """),
+]
+
+PARALLEL_REVIEW_STATEMENTS = [
+    ("reviews", """
+        UNWIND $rows AS row
+        MATCH (p:Paper {id: row.paperid})
+        CREATE (p)-[:HAS]->(:Review {id: row.paperid, score: row.score, main_feedback: row.feedback,
+                                     decision: row.decision})
+        """),
+]
+
+PARALLEL_AFFILIATION_STATEMENTS = [
+    ("affiliations", """
+        UNWIND $rows AS row
+        MATCH (a:Author {id: row.author_id})
+        MATCH (aff:Affiliation {name: row.affiliation})
+        CREATE (a)-[:AFFILIATED_WITH]->(aff)
+        """),
+]
+
+
+# stage -> (rows of a batch, statements, statements of a parallel load)
+STAGES = {
+    "core": (core_rows, CORE_STATEMENTS, PARALLEL_STATEMENTS),
+    "reviews": (review_rows, REVIEW_STATEMENTS, PARALLEL_REVIEW_STATEMENTS),
+    "affiliations": (affiliation_rows, AFFILIATION_STATEMENTS, PARALLEL_AFFILIATION_STATEMENTS),
+}
+
+
+def stage_statements(stages, workers=1):
+    return [statement for stage in stages for statement in STAGES[stage][1 if workers <= 1 else 2]]
+
+
+# Rows of every stage for one batch, all stages read the same parsed papers
+def stage_rows(papers, stages):
+    rows = {}
+    for stage in stages:
+        rows.update(STAGES[stage][0](papers))
+    return rows
+
+
+# Volumes and editions of a parallel load, written once at the end
+EDITION_STATEMENTS = [
+    ("journals", """
+        UNWIND $rows AS row
+        MATCH (j:Journal {id: row.eventid})
+        MERGE (v:Volumen {id: row.edition_id})
+        ON CREATE SET v.volumen = row.edition, v.year = row.year, v.city = row.city
+        MERGE (j)-[:IS_IN]->(v)
+        """),
+    ("conferences", """
+        UNWIND $rows AS row
+        MATCH (c:Conference {id: row.eventid})
+        MERGE (e:Edition {id: row.edition_id})
+        ON CREATE SET e.edition = row.edition, e.year = row.year, e.venue = row.city
+        MERGE (c)-[:BELONGS_TO]->(e)
+        """),
+]
+
+
+# Only the new CITES relationships count: citationCount (in-degree) and referenceCount (out-degree)
+# of their papers and the totals of the venues of those papers are increased once per node and batch
+CITES_STATEMENT = """
+    UNWIND $rows AS row
+    OPTIONAL MATCH (p1:Paper {id: row.paperid})
+    OPTIONAL MATCH (p2:Paper {id: row.cited_id})
+    WITH count(*) - count(p1) AS missing,
+         count(p1) - count(CASE WHEN p1 IS NOT NULL AND p2 IS NOT NULL THEN 1 END) AS dangling,
+         collect(DISTINCT CASE WHEN p1 IS NOT NULL AND p2 IS NOT NULL THEN [p1, p2] END) AS pairs
+    CALL {
+        WITH pairs
+        UNWIND pairs AS pair
+        WITH pair[0] AS p1, pair[1] AS p2
+        WHERE NOT EXISTS { (p1)-[:CITES]->(p2) }
+        CREATE (p1)-[:CITES]->(p2)
+        RETURN collect([p1, p2]) AS created
+    }
+    CALL {
+        WITH created
+        UNWIND created AS pair
+        WITH pair[0] AS p, count(*) AS n
+        SET p.referenceCount = coalesce(p.referenceCount, 0) + n
+        WITH p, n
+        MATCH (p)-[:PUBLISHED_IN]->(v)
+        WITH v, sum(n) AS n
+        SET v.referenceCount = coalesce(v.referenceCount, 0) + n
+    }
+    CALL {
+        WITH created
+        UNWIND created AS pair
+        WITH pair[1] AS p, count(*) AS n
+        SET p.citationCount = coalesce(p.citationCount, 0) + n
+        WITH p, n
+        MATCH (p)-[:PUBLISHED_IN]->(v)
+        WITH v, sum(n) AS n
+        SET v.citationCount = coalesce(v.citationCount, 0) + n
+    }
+    RETURN dangling, missing
+    """
+
+# Citations of a parallel load, without counters: many batches cite the same papers and they are
+# counted once at the end by graph_schema.count_citations. The cited list of a paper holds no
+# duplicates and the graph was empty, so the relationships are simply CREATEd
+PARALLEL_CITES_STATEMENT = """
+    UNWIND $rows AS row
+    OPTIONAL MATCH (p1:Paper {id: row.paperid})
+    OPTIONAL MATCH (p2:Paper {id: row.cited_id})
+    FOREACH (_ IN CASE WHEN p1 IS NULL OR p2 IS NULL THEN [] ELSE [1] END | CREATE (p1)-[:CITES]->(p2))
+    RETURN count(*) - count(p1) AS missing,
+           count(p1) - count(CASE WHEN p1 IS NOT NULL AND p2 IS NOT NULL THEN 1 END) AS dangling
+    """
+
+
+# A parallel load CREATEs the relationships of its papers, so it only runs on a graph without papers
+PAPER_EXISTS_QUERY = "MATCH (p:Paper) RETURN p.id AS id LIMIT 1"
+PARALLEL_LOAD_ERROR = "A parallel load only runs on a graph without papers, use a single worker to load into this one"
+
+
+COUNTERS = ["nodes_created", "nodes_deleted", "relationships_created", "relationships_deleted",
+            "properties_set", "labels_added"]
+
+
+class LoadStats:
+    """Per-statement latency and result summary counters of a load, with progress and a run report."""
+
+    def __init__(self, name, total=None):
+        self.name = name
+        self.total = total
+        self.start = time.time()
+        self.papers = 0
+        self.resumed = 0
+        self.batches = 0
+        self.statements = {}
+
+    # Papers committed by an earlier run of a resumed load, left out of the rates
+    def resume(self, papers):
+        self.papers = self.resumed = papers
+
+    # timings are the (kind, seconds, counters) of the statements of one committed transaction
+    def record(self, timings):
+        for kind, seconds, counters in timings:
+            stats = self.statements.setdefault(kind, {"runs": 0, "rows": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                      **{counter: 0 for counter in COUNTERS}})
+            stats["runs"] += 1
+            stats["rows"] += counters.pop("rows", 0)
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            for counter, value in counters.items():
+                stats[counter] = stats.get(counter, 0) + value
+
+    def progress(self, papers):
+        self.papers += papers
+        self.batches += 1
+        elapsed = time.time() - self.start
+        rate = (self.papers - self.resumed) / elapsed if elapsed > 0 else 0.0
+        line = f"[{self.name}] {self.papers} papers, {rate:.0f} papers/s"
+        if self.total and rate > 0:
+            line += f", ETA {max(self.total - self.papers, 0) / rate:.0f}s"
+        print(line)
+
+    def report(self):
+        elapsed = time.time() - self.start
+        return {
+            "name": self.name,
+            "papers": self.papers,
+            "resumed": self.resumed,
+            "batches": self.batches,
+            "seconds": round(elapsed, 3),
+            "papers_per_second": round((self.papers - self.resumed) / elapsed, 1) if elapsed > 0 else None,
+            "statements": self.statements,
+        }
+
+    def write_report(self, path):
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+        print(f"[{self.name}] {report['papers']} papers in {report['seconds']}s, run report saved as {path}")
+        return report
+
+
+# (kind, seconds, counters) of one statement, the timings that LoadStats records
+def statement_timing(kind, start, counters, params):
+    timing = {counter: getattr(counters, counter, 0) for counter in COUNTERS}
+    timing["rows"] = len(params.get("rows", [params]))
+    return kind, time.perf_counter() - start, timing
+
+
+# Run one statement and return its result records with its timing
+def run_timed(tx, kind, statement, **params):
+    start = time.perf_counter()
+    result = tx.run(statement, **params)
+    records = list(result)
+    return records, statement_timing(kind, start, result.consume().counters, params)
+
+
+# (kind, statement, rows) of the statements of a batch that have rows to write
+def batch_statements(statements, rows):
+    return [(kind, statement, rows[kind]) for kind, statement in statements if rows[kind]]
+
+
+# With bump the graph version changes in the same transaction, so cached query results of the
+# previous graph stop being served exactly when the batch commits
+def write_batch(tx, statements, rows, bump=False):
+    timings = []
+    for kind, statement, kind_rows in batch_statements(statements, rows):
+        _, timing = run_timed(tx, kind, statement, rows=kind_rows)
+        timings.append(timing)
+    if bump:
+        timings.append(run_timed(tx, "version", BUMP_STATEMENT)[1])
+    return timings
+
+
+def citation_statement(workers=1):
+    return CITES_STATEMENT if workers <= 1 else PARALLEL_CITES_STATEMENT
+
+
+# Timings of a citation batch, with its dangling and missing counts
+def citation_timings(records, timing):
+    timing[2]["dangling"] = records[0]["dangling"]
+    timing[2]["missing"] = records[0]["missing"]
+    return [timing]
+
+
+def write_citations(tx, rows, statement=CITES_STATEMENT, bump=False):
+    timings = citation_timings(*run_timed(tx, "cites", statement, rows=rows))
+    if bump:
+        timings.append(run_timed(tx, "version", BUMP_STATEMENT)[1])
+    return timings
+
+
+# Id of a load in its checkpoint: the input file as it is now, so a regenerated file starts over
+def run_id(path, stages):
+    stat = os.stat(path)
+    return f"{path} {stat.st_size} {stat.st_mtime_ns} {list(stages)}"
+
+
+class Checkpoint:
+    """Papers and citations committed by a load, saved after every batch."""
+
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run
+        self.state = {"run": run, "papers": 0, "citations": 0}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("run") == run:
+                self.state = state
+                print(f"Resuming from {path}: {state['papers']} papers and {state['citations']} citations already loaded")
+            else:
+                print(f"Ignoring {path}, it belongs to another load ({state.get('run')})")
+
+    def get(self, phase):
+        return self.state[phase]
+
+    def save(self, phase, count):
+        self.state[phase] = count
+        write_atomic(self.path, json.dumps(self.state))
+
+    def finish(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Quarantine:
+    """NDJSON file of the records that a data error kept out of the graph."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, record, error):
+        with self.lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"error": str(error), "record": record}, ensure_ascii=False, default=str))
+            file.write("\n")
+            self.count += 1
+        print(f"Quarantined a record in {self.path}: {error}")
+
+
+# Retry and bisection policy of commit and commit_or_bisect, shared with async_loader.py
+
+def retry_wait(error, attempt, retries=RETRIES, backoff=BACKOFF):
+    """Seconds to wait before retrying a batch after a transient error, which is raised once retries are spent."""
+    if attempt >= retries:
+        raise error
+    wait = backoff * 2 ** attempt
+    print(f"Transient error, retrying in {wait:g}s: {error}")
+    return wait
+
+
+def bisect(error, batch, split, quarantine):
+    """Halves of a batch that failed with a data error, [] once it is a single record, which is quarantined.
+
+    split(batch) returns (the two halves, None) of a batch, or (None, the record) when it holds a
+    single record. Errors that are not DATA_ERRORS, or without a quarantine, are raised.
+    """
+    if error.code not in DATA_ERRORS or quarantine is None:
+        raise error
+    halves, record = split(batch)
+    if halves is None:
+        quarantine.add(record, error)
+        return []
+    return halves
+
+
+def commit(session, fn, batch):
+    """session.execute_write(fn, batch), retried with exponential backoff while the error is transient."""
+    for attempt in count():
+        try:
+            return session.execute_write(fn, batch)
+        except TRANSIENT_ERRORS as e:
+            time.sleep(retry_wait(e, attempt, RETRIES, BACKOFF))
+
+
+def commit_or_bisect(session, fn, batch, split, quarantine):
+    """Commit a batch; on a data error commit its halves, down to single records that are quarantined.
+
+    Returns the timings of every committed part.
+    """
+    try:
+        return commit(session, fn, batch)
+    except ClientError as e:
+        halves = bisect(e, batch, split, quarantine)
+    return [timing for half in halves for timing in commit_or_bisect(session, fn, half, split, quarantine)]
+
+
+def split_rows(rows):
+    if len(rows) <= 1:
+        return None, rows[0]
+    middle = len(rows) // 2
+    return (rows[:middle], rows[middle:]), None
+
+
+# split of the citation batches, that keeps the quarantined citations in quarantined
+def citation_split(quarantined):
+    def split(rows):
+        halves, record = split_rows(rows)
+        if halves is None:
+            quarantined.append(record)
+        return halves, record
+    return split
+
+
+def citation_summary(total, dangling, missing, quarantined):
+    return (f"Loaded {total - dangling - missing - quarantined} citations, {dangling} cited papers were not found, "
+            f"{missing} citing papers are not in the graph and {quarantined} citations were quarantined")
+
+
+# One "paperid<TAB>cited_id" line per citation row of core_rows
+def spool_citations(rows, spool):
+    for row in rows:
+        spool.write(f"{row['paperid']}\t{row['cited_id']}\n")
+
+
+def read_citations(spool):
+    spool.seek(0)
+    for line in spool:
+        paperid, cited_id = line.rstrip("\n").split("\t")
+        yield {"paperid": paperid, "cited_id": cited_id}
+
+
+def has_papers(driver):
+    with driver.session() as session:
+        return session.run(PAPER_EXISTS_QUERY).single() is not None
+
+
+def create_dimensions(driver, stats):
+    with driver.session() as session:
+        stats.record(session.execute_write(write_batch, DIMENSION_STATEMENTS, dimension_rows()))
+
+
+# Distinct editions of the batch by id, the rows of EDITION_STATEMENTS
+def collect_editions(rows, editions):
+    for kind, _ in EDITION_STATEMENTS:
+        for venue in rows[kind]:
+            editions[kind].setdefault(venue["edition_id"], {
+                key: venue[key] for key in ("edition_id", "eventid", "edition", "year", "city")
+            })
+
+
+def edition_rows(editions):
+    return {kind: list(values.values()) for kind, values in editions.items()}
+
+
+def _write_in_session(driver, fn, *args):
+    with driver.session() as session:
+        return commit_or_bisect(session, fn, *args)
+
+
+def run_batches(driver, fn, batches, workers=1, split=split_rows, quarantine=None):
+    """Run fn(tx, batch) for every batch and yield (batch, timings) in order.
+
+    With workers > 1 each batch gets its own session on a thread pool, with at most two batches per
+    worker in flight. Batches that fail on their data are bisected with split into quarantine.
+    """
+    if workers <= 1:
+        with driver.session() as session:
+            for batch in batches:
+                yield batch, commit_or_bisect(session, fn, batch, split, quarantine)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for batch in batches:
+                pending.append((batch, executor.submit(_write_in_session, driver, fn, batch, split, quarantine)))
+                if len(pending) >= workers * 2:
+                    done, future = pending.popleft()
+                    yield done, future.result()
+            while pending:
+                done, future = pending.popleft()
+                yield done, future.result()
+        finally:
+            # On an error, the batches not started yet are dropped instead of written
+            for _, future in pending:
+                future.cancel()
+
+
+def load_citations(driver, citations, stats, batch_size=CITATION_BATCH_SIZE, workers=1, checkpoint=None, quarantine=None):
+    """Second phase: create the CITES relationships, returns (citations, dangling citation targets).
+
+    Citations of papers that are not in the graph (quarantined ones) and quarantined citations are
+    reported apart, they are neither loaded nor dangling.
+    """
+    total = checkpoint.get("citations") if checkpoint else 0
+    dangling = missing = 0
+    quarantined = []
+    citations = islice(citations, total, None)
+    fn = partial(write_citations, statement=citation_statement(workers), bump=workers <= 1)
+    for rows, timings in run_batches(driver, fn, batched(citations, batch_size), workers, citation_split(quarantined),
+                                     quarantine):
+        stats.record(timings)
+        dangling += sum(timing[2].get("dangling", 0) for timing in timings)
+        missing += sum(timing[2].get("missing", 0) for timing in timings)
+        total += len(rows)
+        if checkpoint:
+            checkpoint.save("citations", total)
+    print(citation_summary(total, dangling, missing, len(quarantined)))
+    return total, dangling
+
+
+# Authors and reviewers of a parallel batch, the rows of its "authors" statement
+def authorship_rows(rows):
+    authorships = [{**row, "reviewer": False} for row in rows.pop("written_by")]
+    authorships += [
+        {"paperid": row["paperid"], "author_id": row["reviewer_id"], "name": row["name"],
+         "position": row["position"], "reviewer": True}
+        for row in rows.pop("reviewed_by")
+    ]
+    return authorships
+
+
+# Shared node locked by the rows of each parallel statement, in the order the statements run
+PARALLEL_LOCK_ORDER = [("authors", "author_id"), ("keywords", "keyword"), ("journals", "eventid"),
+                       ("conferences", "eventid"), ("affiliations", "affiliation")]
+
+
+def batch_rows(papers, stages, parallel=False, reject=None):
+    """(papers, rows) of a batch: the papers whose rows could be built and the rows of every stage.
+
+    The rows are built paper by paper. A malformed record is left out and given to
+    reject(paper, error); without reject the error is raised.
+    """
+    valid = []
+    rows = stage_rows([], stages)
+    for paper in papers:
+        try:
+            paper_rows = stage_rows([paper], stages)
+        except RECORD_ERRORS as e:
+            if reject is None:
+                raise
+            reject(paper, e)
+            continue
+        valid.append(paper)
+        for kind, kind_rows in paper_rows.items():
+            rows[kind] += kind_rows
+    if "affiliations" in rows:
+        rows["affiliations"] = new_affiliations(rows["affiliations"], set())
+    if parallel:
+        # Every transaction takes the locks of the shared nodes in one global order: statement by
+        # statement, and inside each statement by the id of the node. The Author nodes are only
+        # locked by the "authors" statement (each author's affiliation is written by one batch)
+        if "core" in stages:
+            rows["authors"] = authorship_rows(rows)
+        for kind, key in PARALLEL_LOCK_ORDER:
+            if kind in rows:
+                rows[kind].sort(key=lambda row: str(row[key]))
+    return valid, rows
+
+
+# Affiliation rows of the authors that are not in written, which then holds them too, so each
+# author's affiliation is written once
+def new_affiliations(rows, written):
+    fresh = []
+    for row in rows:
+        if row["author_id"] not in written:
+            written.add(row["author_id"])
+            fresh.append(row)
+    return fresh
+
+
+# reject of batch_rows that sets malformed records aside in quarantine and keeps them in quarantined
+def quarantine_records(quarantine, quarantined):
+    if quarantine is None:
+        return None
+
+    def reject(paper, error):
+        quarantine.add(paper, error)
+        quarantined.append(paper)
+    return reject
+
+
+def prepare_batches(papers, batch_size, stages, spool, editions=None, authors=None, reject=None):
+    """Yield (papers, rows, read) of every batch and spool its citations.
+
+    read is the number of input papers of the batch, papers the ones whose rows could be built:
+    malformed records are given to reject (see batch_rows).
+    editions is given for parallel loads: the rows are sorted so every transaction locks the
+    shared nodes in the same order, and the editions are collected instead of written per batch.
+    authors is the set of author ids whose affiliation an earlier batch of the load already has.
+    """
+    for batch in batched(papers, batch_size):
+        valid, rows = batch_rows(batch, stages, editions is not None, reject)
+        if authors is not None and "affiliations" in rows:
+            rows["affiliations"] = new_affiliations(rows["affiliations"], authors)
+        if editions is not None and "core" in stages:
+            collect_editions(rows, editions)
+        if "core" in stages:
+            spool_citations(rows.pop("cites"), spool)
+        yield valid, rows, len(batch)
+
+
+# split of the paper batches of prepare_batches, that keeps the quarantined papers in quarantined
+def paper_split(stages, parallel, quarantined):
+    def split(batch):
+        halves, record = split_rows(batch[0])
+        if halves is None:
+            quarantined.append(record)
+            return None, record
+        # Each affiliation of the batch goes to one half only
+        affiliations = {row["author_id"] for row in batch[1].get("affiliations", ())}
+        parts = []
+        for half in halves:
+            _, rows = batch_rows(half, stages, parallel)
+            rows.pop("cites", None)
+            if "affiliations" in rows:
+                rows["affiliations"] = [row for row in rows["affiliations"] if row["author_id"] in affiliations]
+                affiliations -= {row["author_id"] for row in rows["affiliations"]}
+            parts.append((half, rows, len(half)))
+        return parts, None
+    return split
+
+
+def resume_papers(papers, checkpoint, stats, batch_size, stages, spool, editions=None, authors=None):
+    """The papers left to load after the ones a checkpoint holds.
+
+    Committed papers are only read again for their citations and editions; the malformed ones
+    were already set aside by the run that committed them.
+    """
+    papers = iter(papers)
+    done = checkpoint.get("papers") if checkpoint else 0
+    if done:
+        skip = lambda paper, error: None
+        deque(prepare_batches(islice(papers, done), batch_size, stages, spool, editions, authors, skip), maxlen=0)
+        stats.resume(done)
+    return papers
+
+
+def load_papers(driver, papers, batch_size=BATCH_SIZE, citation_batch_size=CITATION_BATCH_SIZE, workers=1, stats=None,
+                stages=tuple(STAGES), checkpoint=None, quarantine=None):
+    """Load the papers in batches of batch_size, one write transaction per batch, then their citations.
+
+    Only the given stages are written; the citation phase belongs to the core stage. With a
+    checkpoint the papers and citations it already holds are skipped, with a quarantine the
+    records that fail on their data, or that are too malformed to build their rows, are set aside
+    there instead of stopping the load. Returns the
+    number of papers in the graph, without the ones quarantined.
+
+    The parallel statements CREATE their relationships, so a parallel load refuses a graph that
+    already has papers, and a checkpoint: batches committed after the last saved one would be
+    written again on resume.
+    """
+    if checkpoint and workers > 1:
+        raise ValueError("A parallel load (workers > 1) cannot be resumed from a checkpoint")
+    if workers > 1 and has_papers(driver):
+        raise ValueError(PARALLEL_LOAD_ERROR)
+    stats = stats or LoadStats("load")
+    statements = stage_statements(stages, workers)
+    editions = {kind: {} for kind, _ in EDITION_STATEMENTS} if workers > 1 else None
+    authors = set()
+    if workers > 1:
+        create_dimensions(driver, stats)
+
+    def write_papers(tx, batch):
+        return write_batch(tx, statements, batch[1], bump=workers <= 1)
+
+    quarantined = []
+    split = paper_split(stages, editions is not None, quarantined)
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+        papers = resume_papers(papers, checkpoint, stats, batch_size, stages, spool, editions, authors)
+        prepared = prepare_batches(papers, batch_size, stages, spool, editions, authors,
+                                   quarantine_records(quarantine, quarantined))
+        for (_, _, read), timings in run_batches(driver, write_papers, prepared, workers, split, quarantine):
+            stats.record(timings)
+            stats.progress(read)
+            if checkpoint:
+                checkpoint.save("papers", stats.papers)
+
+        if "core" in stages:
+            if editions is not None:
+                with driver.session() as session:
+                    stats.record(session.execute_write(write_batch, EDITION_STATEMENTS, edition_rows(editions)))
+            load_citations(driver, read_citations(spool), stats, citation_batch_size, workers, checkpoint, quarantine)
+            if workers > 1:
+                count_citations(driver)
+    if workers > 1:
+        # The parallel batches leave the version alone, they would all wait on the lock of its node
+        bump_graph_version(driver)
+    if checkpoint:
+        checkpoint.finish()
+    return stats.papers - len(quarantined)
@@ -0,0 +1,203 @@
+"""
+graph_schema.py
+
+Constraints and indexes of the Paper/Author/Keyword/Venue model, created idempotently before
+loading so every MATCH/MERGE on an id is an index seek instead of a label scan. Running this file
+also checks the PartB and PartC queries with EXPLAIN and reports the ones whose plan still
+contains a label scan or a cartesian product.
+
+migrate() moves a database loaded before Review nodes were per paper and Edition/Volumen nodes per
+venue to the current keys, and sets the citation counters that the loaders now keep on papers and
+venues, batch by batch. It can be run again safely.
+
+"""
+
+import importlib.util
+import os
+
+from neo4j import GraphDatabase
+
+from query_cache import bump_graph_version
+
+NEO4J_URI = "bolt://localhost:7687"
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "neo4j"
+
+SCHEMA = [
+    "CREATE CONSTRAINT paper_id IF NOT EXISTS FOR (p:Paper) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT author_id IF NOT EXISTS FOR (a:Author) REQUIRE a.id IS UNIQUE",
+    "CREATE CONSTRAINT keyword_name IF NOT EXISTS FOR (k:Keyword) REQUIRE k.name IS UNIQUE",
+    "CREATE CONSTRAINT journal_id IF NOT EXISTS FOR (j:Journal) REQUIRE j.id IS UNIQUE",
+    "CREATE CONSTRAINT conference_id IF NOT EXISTS FOR (c:Conference) REQUIRE c.id IS UNIQUE",
+    "CREATE CONSTRAINT affiliation_name IF NOT EXISTS FOR (aff:Affiliation) REQUIRE aff.name IS UNIQUE",
+    "CREATE CONSTRAINT review_id IF NOT EXISTS FOR (r:Review) REQUIRE r.id IS UNIQUE",
+    "CREATE CONSTRAINT edition_id IF NOT EXISTS FOR (e:Edition) REQUIRE e.id IS UNIQUE",
+    "CREATE CONSTRAINT volumen_id IF NOT EXISTS FOR (v:Volumen) REQUIRE v.id IS UNIQUE",
+    "CREATE INDEX paper_type IF NOT EXISTS FOR (p:Paper) ON (p.type)",
+    "CREATE INDEX paper_citation_count IF NOT EXISTS FOR (p:Paper) ON (p.citationCount)",
+    "CREATE INDEX paper_reference_count IF NOT EXISTS FOR (p:Paper) ON (p.referenceCount)",
+    "CREATE INDEX journal_paper_count IF NOT EXISTS FOR (j:Journal) ON (j.paperCount)",
+]
+
+AWAIT_INDEXES = "CALL db.awaitIndexes()"
+
+# Citation counters of the papers and venues written without them: databases loaded before the
+# loaders kept them, parallel loads and bulk imports. Papers first, the venues add up theirs
+COUNTER_STATEMENTS = [
+    """
+    MATCH (p:Paper) WHERE p.citationCount IS NULL OR p.referenceCount IS NULL
+    CALL {
+        WITH p
+        SET p.citationCount = COUNT { (p)<-[:CITES]-(:Paper) },
+            p.referenceCount = COUNT { (p)-[:CITES]->(:Paper) }
+    } IN TRANSACTIONS OF 10000 ROWS
+    """,
+    """
+    MATCH (v) WHERE (v:Journal OR v:Conference) AND v.paperCount IS NULL
+    CALL {
+        WITH v
+        OPTIONAL MATCH (v)<-[:PUBLISHED_IN]-(p:Paper)
+        WITH v, count(p) AS papers, sum(p.citationCount) AS cited, sum(p.referenceCount) AS citing
+        SET v.paperCount = papers, v.citationCount = cited, v.referenceCount = citing
+    } IN TRANSACTIONS OF 100 ROWS
+    """,
+]
+
+# Shared Review nodes become one per paper (id = paper id) and Edition/Volumen nodes shared by
+# several venues are split by venue (id = edition_key of graph_loader.py). Only nodes without an
+# id are touched, the old ones are removed once nothing points to them.
+MIGRATION = [
+    """
+    MATCH (p:Paper)-[h:HAS]->(r:Review) WHERE r.id IS NULL
+    CALL {
+        WITH p, h, r
+        MERGE (n:Review {id: p.id})
+        ON CREATE SET n.score = r.score, n.main_feedback = r.main_feedback, n.decision = r.decision
+        MERGE (p)-[:HAS]->(n)
+        DELETE h
+    } IN TRANSACTIONS OF 10000 ROWS
+    """,
+    """
+    MATCH (c:Conference)-[b:BELONGS_TO]->(e:Edition) WHERE e.id IS NULL
+    CALL {
+        WITH c, b, e
+        MERGE (n:Edition {id: c.id + '|' + toString(e.edition) + '|' + toString(e.year)})
+        ON CREATE SET n.edition = e.edition, n.year = e.year, n.venue = e.venue
+        MERGE (c)-[:BELONGS_TO]->(n)
+        DELETE b
+    } IN TRANSACTIONS OF 10000 ROWS
+    """,
+    """
+    MATCH (j:Journal)-[i:IS_IN]->(v:Volumen) WHERE v.id IS NULL
+    CALL {
+        WITH j, i, v
+        MERGE (n:Volumen {id: j.id + '|' + toString(v.volumen) + '|' + toString(v.year)})
+        ON CREATE SET n.volumen = v.volumen, n.year = v.year, n.city = v.city
+        MERGE (j)-[:IS_IN]->(n)
+        DELETE i
+    } IN TRANSACTIONS OF 10000 ROWS
+    """,
+    """
+    MATCH (n) WHERE (n:Review OR n:Edition OR n:Volumen) AND n.id IS NULL
+    CALL {
+        WITH n
+        DETACH DELETE n
+    } IN TRANSACTIONS OF 10000 ROWS
+    """,
+    "DROP INDEX edition_key IF EXISTS",
+    "DROP INDEX volumen_key IF EXISTS",
+    *COUNTER_STATEMENTS,
+]
+
+# Plan operators that mean the query touches every node of a label or multiplies two row sets
+FLAGGED_OPERATORS = {"NodeByLabelScan", "AllNodesScan", "CartesianProduct"}
+
+QUERY_FILES = ["PartB_AlbuquerqueFernandez.py", "PartC_AlbuquerqueFernandez.py"]
+
+
+def create_schema(driver):
+    with driver.session() as session:
+        for statement in SCHEMA:
+            session.run(statement).consume()
+        session.run(AWAIT_INDEXES).consume()
+    print(f"Schema ready ({len(SCHEMA)} constraints and indexes)")
+
+
+def count_citations(driver):
+    """Set the citation counters of the papers and venues that do not have them yet."""
+    with driver.session() as session:
+        for statement in COUNTER_STATEMENTS:
+            counters = session.run(statement).consume().counters
+            print(f"Citation counters: {counters.properties_set} properties set")
+
+
+def migrate(driver):
+    """Move an existing database to per-paper Review and per-venue Edition/Volumen nodes."""
+    with driver.session() as session:
+        for statement in MIGRATION:
+            # CALL ... IN TRANSACTIONS only runs in an auto-commit transaction
+            counters = session.run(statement).consume().counters
+            print(f"Migration: {counters.nodes_created} nodes created, {counters.nodes_deleted} deleted")
+    bump_graph_version(driver)
+
+
+def load_queries(path):
+    """(description, query) of every query method of the Neo4jQueries class of a PartB/PartC file."""
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0].replace(".", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # An instance without a driver whose run_query hands the query back instead of running it
+    queries = module.Neo4jQueries.__new__(module.Neo4jQueries)
+    queries.run_query = lambda query, description, **kwargs: (description, query)
+
+    skip = {"run_query", "close", "execute_and_display_queries"}
+    return [
+        getattr(queries, name)()
+        for name, member in vars(module.Neo4jQueries).items()
+        if callable(member) and not name.startswith("_") and name not in skip
+    ]
+
+
+def plan_operators(plan):
+    operators = [plan["operatorType"].split("@")[0]]
+    for child in plan.get("children", []):
+        operators.extend(plan_operators(child))
+    return operators
+
+
+def advise(driver, queries):
+    """EXPLAIN every query and return {description: flagged operators} of the ones that need attention."""
+    report = {}
+    with driver.session() as session:
+        for description, query in queries:
+            try:
+                plan = session.run("EXPLAIN " + query).consume().plan
+            except Exception as e:
+                print(f"Could not explain {description}: {e}")
+                continue
+            flagged = sorted(set(plan_operators(plan)) & FLAGGED_OPERATORS)
+            if flagged:
+                report[description] = flagged
+                print(f"[WARN] {description}: {', '.join(flagged)}")
+            else:
+                print(f"[OK]   {description}")
+    return report
+
+
+def main():
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        create_schema(driver)
+        migrate(driver)
+        queries = []
+        for path in QUERY_FILES:
+            queries.extend(load_queries(path))
+        report = advise(driver, queries)
+        print(f"\n{len(report)} of {len(queries)} queries still plan a label scan or a cartesian product")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
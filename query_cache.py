@@ -0,0 +1,145 @@
+"""
+query_cache.py
+
+Result cache of the read queries of PartB and PartC. Results are kept in an LRU in memory and,
+optionally, as JSON files in a directory, keyed by the graph version, the query text and its
+parameters. The graph version is a counter on a single GraphVersion node that the loaders bump
+in the transaction of every batch (a parallel load once, at its end), so a cached result is never
+served once the graph has changed. The node also holds a random token of the database, so a wiped
+or another database that reaches the same counter never shares entries with this one. On disk the
+entries of a version are removed once a newer version of the same database is cached.
+
+Queries that write (CREATE, MERGE, SET, DELETE, REMOVE) always run against the database and bump
+the version in the same transaction. A database without a GraphVersion node is never cached.
+
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections import OrderedDict
+
+from corpus_io import write_atomic
+
+MAX_ENTRIES = 128
+
+VERSION_QUERY = "OPTIONAL MATCH (v:GraphVersion {id: 'graph'}) RETURN v.token AS token, v.version AS version"
+BUMP_STATEMENT = """
+    MERGE (v:GraphVersion {id: 'graph'})
+    ON CREATE SET v.token = randomUUID()
+    SET v.version = coalesce(v.version, 0) + 1
+    """
+
+WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE)\b", re.IGNORECASE)
+
+
+def is_write_query(query):
+    return WRITE_CLAUSES.search(query) is not None
+
+
+# (database token, version) of the graph, None when nothing ever bumped it
+def graph_version(session):
+    record = session.run(VERSION_QUERY).single()
+    if record is None or record["token"] is None:
+        return None
+    return record["token"], record["version"]
+
+
+# Bump inside a write transaction (or a session), so the version changes exactly when its writes commit
+def bump_version(tx):
+    tx.run(BUMP_STATEMENT).consume()
+
+
+def bump_graph_version(driver):
+    with driver.session() as session:
+        bump_version(session)
+
+
+class QueryCache:
+    """LRU of query results with an optional on-disk tier."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(version, query, params):
+        # version is the (token, counter) pair of graph_version
+        payload = json.dumps([version, " ".join(query.split()), params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # Entries of one graph version share a directory, dropped as soon as a newer version is cached
+    def path(self, version, key):
+        return os.path.join(self.directory, "%s-%s" % version, key[:2], key + ".json")
+
+    def prune(self, version):
+        """Remove the entries of the earlier versions of this database, which are never read again."""
+        token, counter = version
+        for name in os.listdir(self.directory):
+            entry_token, _, entry_counter = name.rpartition("-")
+            if entry_token == token and entry_counter.isdigit() and int(entry_counter) < counter:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def get(self, version, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.directory:
+            try:
+                with open(self.path(version, key), "r", encoding="utf-8") as file:
+                    records = json.load(file)
+            except FileNotFoundError:
+                pass
+            else:
+                self.hits += 1
+                self.remember(key, records)
+                return records
+        self.misses += 1
+        return None
+
+    def remember(self, key, records):
+        self.entries[key] = records
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def put(self, version, key, records):
+        self.remember(key, records)
+        if self.directory:
+            try:
+                payload = json.dumps(records)
+            except TypeError:
+                # Values without a JSON form (temporal types, paths...) stay in memory only
+                return
+            path = self.path(version, key)
+            if not os.path.isdir(os.path.dirname(os.path.dirname(path))):
+                os.makedirs(self.directory, exist_ok=True)
+                self.prune(version)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, payload)
+
+    def run(self, session, query, **params):
+        """Records of the query as dicts, from the cache while the graph version is unchanged."""
+        if is_write_query(query):
+            def write(tx):
+                records = [record.data() for record in tx.run(query, **params)]
+                bump_version(tx)
+                return records
+            return session.execute_write(write)
+
+        version = graph_version(session)
+        if version is None:
+            return [record.data() for record in session.run(query, **params)]
+
+        key = self.key(version, query, params)
+        records = self.get(version, key)
+        if records is None:
+            records = [record.data() for record in session.run(query, **params)]
+            self.put(version, key, records)
+        return records
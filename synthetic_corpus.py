@@ -0,0 +1,173 @@
+"""
+synthetic_corpus.py
+
+Generator of large synthetic corpora for load testing the ingestion (PartA.2, PartA.3A) and the
+queries of PartB, PartC and PartD. The papers are built from the catalogs of synthetic_data.py and
+have the same record shape as the enriched dblp.json, including authors, reviewers and citations.
+
+All random draws are vectorized with NumPy one chunk at a time and every chunk is written out
+before the next one is drawn, so memory stays bounded by the chunk size.
+
+"""
+
+import numpy as np
+
+from corpus_io import write_papers
+from enrichment import paper_id_for_key
+from synthetic_data import keyword_list, paper_reviews, affiliations, batch_enrichment, PAPER_TYPES
+
+N_PAPERS = 1_000_000
+OUTPUT_FILE = "synthetic.ndjson"
+CHUNK_SIZE = 100_000
+SEED = 42
+
+# "uniform": 1-5 citations to any paper. "preferential": power-law in-degree, papers only cite
+# older papers and a few authors write most of the papers
+CITATION_PROFILE = "uniform"
+CITATION_EXPONENT = 2.5
+AUTHOR_EXPONENT = 1.0
+
+FIRST_YEAR = 1990
+LAST_YEAR = 2024
+
+
+def synthetic_key(index):
+    return f"synthetic/{index}"
+
+
+def author_record(index):
+    return {"@pid": f"s/{index}", "text": f"Synthetic Author {index}"}
+
+
+def build_topology(rng, n_papers, n_authors, exponent=CITATION_EXPONENT, author_exponent=AUTHOR_EXPONENT):
+    """Cumulative weights of the preferential profile.
+
+    Every paper gets a Pareto distributed fitness with tail index exponent - 1 and is cited with
+    probability proportional to it among the papers published before the citing one. Older and
+    fitter papers keep attracting citations, which gives the in-degree a power-law tail with the
+    given exponent. Authors are drawn with Zipf weights rank^-author_exponent (1.0 follows Lotka's
+    law). These two arrays are the only per-corpus state, 8 bytes per paper and per author.
+    """
+    fitness = (1.0 - rng.random(n_papers)) ** (-1.0 / (exponent - 1.0))
+    author_weights = np.arange(1, n_authors + 1, dtype=np.float64) ** -author_exponent
+    return {"papers": np.cumsum(fitness), "authors": np.cumsum(author_weights)}
+
+
+# Draw from the first `limit` entries of a cumulative weight array
+def draw_weighted(rng, cumulative, limit):
+    totals = cumulative[limit - 1]
+    return np.searchsorted(cumulative, rng.random(len(limit)) * totals, side="right")
+
+
+def draw_chunk(rng, start, size, n_papers, n_authors, topology=None):
+    """Draw every random attribute of papers [start, start + size) as NumPy arrays."""
+    types = np.array(PAPER_TYPES, dtype=object)[rng.integers(0, len(PAPER_TYPES), size)]
+    columns = batch_enrichment(types, rng.integers(0, 2**64, size, dtype=np.uint64))
+    if topology is None:
+        years = rng.integers(FIRST_YEAR, LAST_YEAR + 1, size)
+    else:
+        # Papers are ordered by year so that citations always point back in time
+        years = FIRST_YEAR + (np.arange(start, start + size) * (LAST_YEAR - FIRST_YEAR + 1)) // n_papers
+
+    author_counts = rng.integers(1, 5, size)
+    if topology is None:
+        authors = rng.integers(0, n_authors, author_counts.sum())
+    else:
+        authors = draw_weighted(rng, topology["authors"], np.full(author_counts.sum(), n_authors))
+    reviewers = rng.integers(0, n_authors, (size, 3))
+
+    citation_counts = rng.integers(1, 6, size)
+    citing = np.repeat(np.arange(start, start + size), citation_counts)
+    if topology is None:
+        citations = rng.integers(0, n_papers, citation_counts.sum())
+        # A paper never cites itself
+        citations = np.where(citations == citing, (citations + 1) % n_papers, citations)
+    else:
+        # Only older papers can be cited, the first paper cites nothing
+        citing = citing[citing > 0]
+        citations = draw_weighted(rng, topology["papers"], citing)
+        citation_counts = np.bincount(citing - start, minlength=size)
+
+    return {
+        **columns,
+        "years": years,
+        "author_offsets": np.concatenate(([0], np.cumsum(author_counts))),
+        "authors": authors,
+        "reviewers": reviewers,
+        "citation_offsets": np.concatenate(([0], np.cumsum(citation_counts))),
+        "citations": citations,
+    }
+
+
+def build_papers(rng, start, chunk, n_authors):
+    author_offsets = chunk["author_offsets"].tolist()
+    authors = chunk["authors"].tolist()
+    citation_offsets = chunk["citation_offsets"].tolist()
+    citations = chunk["citations"].tolist()
+    reviewers = chunk["reviewers"].tolist()
+
+    for i, paper_type in enumerate(chunk["type"]):
+        index = start + i
+        key = synthetic_key(index)
+
+        paper_authors = list(dict.fromkeys(authors[author_offsets[i]:author_offsets[i + 1]]))
+
+        # Reviewers never review their own paper, redraw the rare collisions
+        paper_reviewers = []
+        for reviewer in reviewers[i]:
+            while reviewer in paper_authors or reviewer in paper_reviewers:
+                reviewer = int(rng.integers(0, n_authors))
+            paper_reviewers.append(reviewer)
+
+        cited = dict.fromkeys(citations[citation_offsets[i]:citation_offsets[i + 1]])
+        keywords = [keyword_list[k] for k in chunk["keywords"][i]]
+
+        yield {
+            "@id": str(index),
+            "info": {
+                "authors": {"author": [author_record(a) for a in paper_authors]},
+                "paperid": paper_id_for_key(key),
+                "title": f"Synthetic paper {index} on {keywords[0]}",
+                "venue": chunk["event_name"][i],
+                "year": str(chunk["years"][i]),
+                "type": paper_type,
+                "key": key,
+                "doi": f"10.0000/synthetic.{index}",
+                "url": f"https://dblp.org/rec/{key}",
+                "keywords": keywords,
+                "reviewers": {"author": [author_record(r) for r in paper_reviewers]},
+                "review": [paper_reviews[chunk["review"][i]]],
+                "affiliation": [affiliations[chunk["affiliation"][i]]],
+                "cited": [paper_id_for_key(synthetic_key(c)) for c in cited],
+                "eventid": chunk["eventid"][i],
+                "event_name": chunk["event_name"][i],
+                "edition": int(chunk["edition"][i]),
+                "city": chunk["city"][i],
+            },
+        }
+
+
+def generate_papers(n_papers, n_authors=None, chunk_size=CHUNK_SIZE, seed=SEED, profile=CITATION_PROFILE,
+                    exponent=CITATION_EXPONENT, author_exponent=AUTHOR_EXPONENT):
+    """Yield n_papers synthetic papers, drawing their attributes chunk by chunk."""
+    n_authors = n_authors or max(n_papers // 2, 10)
+    rng = np.random.default_rng(seed)
+    topology = None
+    if profile == "preferential":
+        topology = build_topology(rng, n_papers, n_authors, exponent, author_exponent)
+    elif profile != "uniform":
+        raise ValueError(f"Unknown citation profile: {profile}")
+
+    for start in range(0, n_papers, chunk_size):
+        size = min(chunk_size, n_papers - start)
+        chunk = draw_chunk(rng, start, size, n_papers, n_authors, topology)
+        yield from build_papers(rng, start, chunk, n_authors)
+
+
+def main():
+    count = write_papers(generate_papers(N_PAPERS), OUTPUT_FILE, query="synthetic")
+    print(f"Synthetic corpus of {count} papers saved as {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ in order to create the relationships in the platform.
 import random
 import re
 
+import numpy as np
+
 keyword_list = [
     "Algorithm",
     "Data Structure",
@@ -202,3 +204,73 @@ def update_type(entry):
 
 
 
+
+
+# Batch versions of the functions above. They take a whole array of papers at once and return
+# columns, drawn from the catalogs below with per-paper seeds so that a paper gets the same values
+# whatever batch it is in.
+
+PAPER_TYPES = ["Journal", "Conference", "Workshop"]
+DBLP_TYPES = {"Journal Articles": "Journal", "Conference and Workshop Papers": "Conference", "Editorship": "Workshop"}
+
+# The three event catalogs concatenated; a type code selects its slice
+_events = journals + conferences + workshops
+EVENT_IDS = np.array([event["id"] for event in _events], dtype=object)
+EVENT_NAMES = np.array([event["name"] for event in _events], dtype=object)
+EVENT_EDITIONS = np.array([event["edition"] for event in _events])
+EVENT_CITIES = np.array([event["city"] for event in _events], dtype=object)
+EVENT_OFFSETS = np.array([0, len(journals), len(journals) + len(conferences)])
+EVENT_SIZES = np.array([len(journals), len(conferences), len(workshops)])
+KEYWORDS = np.array(keyword_list, dtype=object)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+# splitmix64 of every seed for `draws` streams, as uniforms in [0, 1) with shape (papers, draws)
+def paper_uniforms(seeds, draws):
+    with np.errstate(over="ignore"):
+        x = np.asarray(seeds, dtype=np.uint64)[:, None] + _GOLDEN * np.arange(1, draws + 1, dtype=np.uint64)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+# Same mapping as update_type, plus the event catalog code of every paper (0 journals,
+# 1 conferences, 2 workshops; other types draw journals like assign_event_attributes)
+def batch_update_type(types):
+    codes = {name: code for code, name in enumerate(PAPER_TYPES)}
+    updated = np.array([DBLP_TYPES.get(t, t) for t in types], dtype=object)
+    return updated, np.array([codes.get(t, 0) for t in updated], dtype=np.int64)
+
+
+def batch_event_attributes(type_codes, uniforms):
+    events = EVENT_OFFSETS[type_codes] + (uniforms * EVENT_SIZES[type_codes]).astype(np.int64)
+    return {
+        "eventid": EVENT_IDS[events],
+        "event_name": EVENT_NAMES[events],
+        "edition": EVENT_EDITIONS[events],
+        "city": EVENT_CITIES[events],
+    }
+
+
+def batch_enrichment(types, seeds):
+    """Synthetic attributes of a batch of papers.
+
+    types are DBLP or already updated paper types, seeds one 64-bit seed per paper. Returns the
+    columns type, eventid, event_name, edition, city, keywords (indices into keyword_list, shape
+    (n, 3)), review (index into paper_reviews) and affiliation (index into affiliations).
+    """
+    updated_types, type_codes = batch_update_type(types)
+    uniforms = paper_uniforms(seeds, len(keyword_list) + 3)
+
+    # 3 distinct keywords: the 3 smallest of one uniform per keyword
+    keywords = np.argsort(uniforms[:, :len(keyword_list)], axis=1)[:, :3]
+    extra = uniforms[:, len(keyword_list):]
+
+    columns = batch_event_attributes(type_codes, extra[:, 0])
+    columns["type"] = updated_types
+    columns["keywords"] = keywords
+    columns["review"] = (extra[:, 1] * len(paper_reviews)).astype(np.int64)
+    columns["affiliation"] = (extra[:, 2] * len(affiliations)).astype(np.int64)
+    return columns
@@ -0,0 +1,68 @@
+"""
+Local stand-in for the dblp.org publication search API.
+
+Serves generated fixture pages for any `f=` offset and `h=` hit count on 127.0.0.1, in the
+response format of DBLP_API_URL, and counts the requests it has seen and the most that were
+open at once.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TYPES = ["Journal Articles", "Conference and Workshop Papers", "Editorship"]
+
+
+def fixture_hit(i):
+    authors = [{"@pid": f"p{(i * 7 + k) % 400}", "text": f"Author {(i * 7 + k) % 400}"} for k in range(1 + i % 3)]
+    return {"@id": str(i), "info": {"key": f"rec/{i}", "title": f"Title {i}", "year": str(2000 + i % 20),
+                                    "type": TYPES[i % 3], "authors": {"author": authors}}}
+
+
+class StandInServer(ThreadingHTTPServer):
+    def __init__(self, total):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.total = total
+        self.lock = threading.Lock()
+        self.requests = []
+        self.open = 0
+        self.max_open = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/search/publ/api"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        offset, size = int(query["f"][0]), int(query["h"][0])
+        with server.lock:
+            server.requests.append(offset)
+            server.open += 1
+            server.max_open = max(server.max_open, server.open)
+        try:
+            hits = [fixture_hit(i) for i in range(offset, min(offset + size, server.total))]
+            body = json.dumps({"result": {"hits": {"@total": str(server.total), "@sent": str(len(hits)),
+                                                   "@first": str(offset), "hit": hits}}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.open -= 1
@@ -0,0 +1,164 @@
+"""
+In-process stand-in for the sync and async Neo4j drivers.
+
+Statements are not executed: every run is recorded as (statement, parameters) and returns the
+records the loaders read back (dangling/missing citation counts, the graph version), or the ones
+`results` gives for a fragment of the statement. `latency` adds a network wait to every statement
+and `fail(statement, parameters)` may raise to simulate errors. The statements run outside a
+transaction function are also kept in `autocommit`. Enough to drive graph_loader.py and
+async_loader.py without a database.
+"""
+
+import asyncio
+import threading
+import time
+import types
+
+from neo4j.exceptions import Neo4jError
+
+from graph_loader import COUNTERS
+
+CONSTRAINT_ERROR = "Neo.ClientError.Schema.ConstraintValidationFailed"
+
+
+# Error the server would raise with this code, e.g. a data error for fail
+def server_error(message, code=CONSTRAINT_ERROR):
+    return Neo4jError._hydrate_neo4j(code=code, message=message)
+
+
+class Result:
+    def __init__(self, statement, parameters, results=None):
+        self.records = []
+        matches = [records for fragment, records in (results or {}).items() if fragment in statement]
+        if matches:
+            self.records = matches[0]
+        elif "dangling" in statement:
+            self.records = [{"dangling": 0, "missing": 0}]
+        elif "GraphVersion" in statement and "RETURN" in statement:
+            self.records = [{"version": 0}]
+        rows = len(parameters.get("rows", [parameters]))
+        self.counters = types.SimpleNamespace(**{counter: rows for counter in COUNTERS})
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def single(self):
+        return self.records[0] if self.records else None
+
+    def consume(self):
+        return self
+
+
+class AsyncResult(Result):
+    async def single(self):
+        return Result.single(self)
+
+    def __aiter__(self):
+        async def records():
+            for record in self.records:
+                yield record
+        return records()
+
+    async def consume(self):
+        return self
+
+
+class Driver:
+    def __init__(self, latency=0.0, fail=None, results=None):
+        self.latency = latency
+        self.fail = fail
+        self.results = results
+        self.log = []
+        self.autocommit = []
+        self.lock = threading.Lock()
+        self.transactions = 0
+
+    def record(self, statement, parameters):
+        if self.fail:
+            self.fail(statement, parameters)
+        with self.lock:
+            self.log.append((statement, parameters))
+            self.autocommit.append(statement)
+
+    def statements(self, fragment):
+        return [parameters for statement, parameters in self.log if fragment in statement]
+
+    def session(self, **config):
+        return Session(self)
+
+    def close(self):
+        pass
+
+
+class Transaction:
+    def __init__(self, driver):
+        self.driver = driver
+        self.log = []
+
+    def run(self, statement, **parameters):
+        time.sleep(self.driver.latency)
+        if self.driver.fail:
+            self.driver.fail(statement, parameters)
+        self.log.append((statement, parameters))
+        return Result(statement, parameters, self.driver.results)
+
+
+class Session:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def run(self, statement, **parameters):
+        self.driver.record(statement, parameters)
+        return Result(statement, parameters, self.driver.results)
+
+    # Only the statements of a transaction that returns are kept, like a commit
+    def execute_write(self, fn, *args):
+        tx = Transaction(self.driver)
+        result = fn(tx, *args)
+        with self.driver.lock:
+            self.driver.log.extend(tx.log)
+            self.driver.transactions += 1
+        return result
+
+
+class AsyncDriver(Driver):
+    def session(self, **config):
+        return AsyncSession(self)
+
+    async def close(self):
+        pass
+
+
+class AsyncTransaction(Transaction):
+    async def run(self, statement, **parameters):
+        await asyncio.sleep(self.driver.latency)
+        if self.driver.fail:
+            self.driver.fail(statement, parameters)
+        self.log.append((statement, parameters))
+        return AsyncResult(statement, parameters, self.driver.results)
+
+
+class AsyncSession(Session):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def run(self, statement, **parameters):
+        self.driver.record(statement, parameters)
+        return AsyncResult(statement, parameters, self.driver.results)
+
+    async def execute_write(self, fn, *args):
+        tx = AsyncTransaction(self.driver)
+        result = await fn(tx, *args)
+        with self.driver.lock:
+            self.driver.log.extend(tx.log)
+            self.driver.transactions += 1
+        return result
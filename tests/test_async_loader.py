@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from async_loader import load_papers
+from graph_loader import PAPER_EXISTS_QUERY, LoadStats, Quarantine
+from synthetic_corpus import generate_papers
+
+from neo4j_stand_in import AsyncDriver, server_error
+
+
+def written_papers(driver):
+    return sorted(row["paperid"] for rows in driver.statements("MERGE (p:Paper") for row in rows["rows"])
+
+
+def test_batches_in_flight_overlap_the_network_waits():
+    papers = list(generate_papers(200))
+    elapsed = {}
+    drivers = {}
+    for in_flight in (1, 4):
+        drivers[in_flight] = AsyncDriver(latency=0.005)
+        start = time.perf_counter()
+        asyncio.run(load_papers(drivers[in_flight], papers, 20, max_in_flight=in_flight, stats=LoadStats("test")))
+        elapsed[in_flight] = time.perf_counter() - start
+    assert elapsed[4] < elapsed[1]
+    assert written_papers(drivers[4]) == written_papers(drivers[1]) == sorted(p["info"]["paperid"] for p in papers)
+
+
+def test_failed_batch_cancels_the_batches_in_flight():
+    papers = list(generate_papers(100))
+    bad = papers[25]["info"]["paperid"]
+
+    def fail(statement, parameters):
+        if "MERGE (p:Paper" in statement and any(row.get("paperid") == bad for row in parameters.get("rows", [])):
+            raise RuntimeError("connection lost")
+
+    driver = AsyncDriver(latency=0.01, fail=fail)
+
+    async def load():
+        with pytest.raises(RuntimeError):
+            await load_papers(driver, papers, 10, max_in_flight=4, stats=LoadStats("test"))
+        committed = driver.transactions
+        await asyncio.sleep(0.2)
+        return committed
+
+    committed = asyncio.run(load())
+    assert driver.transactions == committed
+    assert len(written_papers(driver)) < len(papers) - 10
+
+
+def test_quarantined_papers_are_not_counted(tmp_path):
+    papers = list(generate_papers(50))
+    bad = papers[7]["info"]["paperid"]
+
+    def fail(statement, parameters):
+        if "MERGE (p:Paper" in statement and any(row.get("paperid") == bad for row in parameters.get("rows", [])):
+            raise server_error("bad record")
+
+    quarantine = Quarantine(str(tmp_path / "quarantine.ndjson"))
+    loaded = asyncio.run(load_papers(AsyncDriver(fail=fail), papers, 10, max_in_flight=1, stats=LoadStats("test"),
+                                     quarantine=quarantine))
+    assert loaded == 49
+    assert quarantine.count == 1
+
+
+def test_parallel_load_refuses_a_graph_with_papers():
+    driver = AsyncDriver(results={PAPER_EXISTS_QUERY: [{"id": "p"}]})
+    with pytest.raises(ValueError):
+        asyncio.run(load_papers(driver, generate_papers(10), 5, max_in_flight=2))
+    assert not driver.statements("UNWIND")
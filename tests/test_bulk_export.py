@@ -0,0 +1,47 @@
+import csv
+import os
+
+import graph_loader
+from bulk_export import export
+from graph_loader import load_papers
+from synthetic_corpus import generate_papers
+
+from neo4j_stand_in import Driver
+
+
+def read_csv(directory, name, *columns):
+    with open(os.path.join(directory, name), encoding="utf-8", newline="") as file:
+        rows = list(csv.reader(file))[1:]
+    return sorted(tuple(str(row[column]) for column in columns) for row in rows)
+
+
+def loader_rows(driver, statements, kind, *keys):
+    statement = dict(statements)[kind]
+    rows = [row for parameters in driver.statements(statement) for row in parameters["rows"]]
+    return sorted(tuple(str(row[key]) for key in keys) for row in rows)
+
+
+def test_csv_files_match_the_loader(tmp_path):
+    papers = list(generate_papers(300, seed=7))
+    papers[3]["info"]["keywords"].append(papers[3]["info"]["keywords"][0])
+    export(papers, str(tmp_path))
+
+    driver = Driver()
+    load_papers(driver, papers, 64)
+    core, reviews, affiliations = graph_loader.CORE_STATEMENTS, graph_loader.REVIEW_STATEMENTS, graph_loader.AFFILIATION_STATEMENTS
+    directory = str(tmp_path)
+
+    assert read_csv(directory, "papers.csv", 0) == loader_rows(driver, core, "papers", "paperid")
+    assert read_csv(directory, "written_by.csv", 0, 2, 1) == loader_rows(driver, core, "written_by", "paperid", "author_id", "position")
+    assert read_csv(directory, "reviewed_by.csv", 0, 2, 1) == loader_rows(driver, core, "reviewed_by", "paperid", "reviewer_id", "position")
+    assert read_csv(directory, "has_keyword.csv", 0, 1) == sorted(set(loader_rows(driver, core, "keywords", "paperid", "keyword")))
+    assert read_csv(directory, "published_in_journal.csv", 0, 1) == loader_rows(driver, core, "journals", "paperid", "eventid")
+    assert read_csv(directory, "published_in_conference.csv", 0, 1) == loader_rows(driver, core, "conferences", "paperid", "eventid")
+    assert read_csv(directory, "volumes.csv", 0) == sorted(set(loader_rows(driver, core, "journals", "edition_id")))
+    assert read_csv(directory, "editions.csv", 0) == sorted(set(loader_rows(driver, core, "conferences", "edition_id")))
+    assert read_csv(directory, "reviews.csv", 0) == loader_rows(driver, reviews, "reviews", "paperid")
+    assert read_csv(directory, "affiliated_with.csv", 0, 1) == sorted(set(loader_rows(driver, affiliations, "affiliations", "author_id", "affiliation")))
+
+    cites = [(row["paperid"], row["cited_id"]) for parameters in driver.statements(graph_loader.CITES_STATEMENT)
+             for row in parameters["rows"]]
+    assert read_csv(directory, "cites.csv", 0, 1) == sorted(cites)
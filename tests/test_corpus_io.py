@@ -0,0 +1,61 @@
+import io
+import json
+
+import pytest
+
+from corpus_io import HITS_PATH, JsonStream, iter_json_array
+
+
+def dblp_response(hits, with_hits=True):
+    """A search response as the baseline PartA.1 saved it: json.dump(indent=4), hit after the counts."""
+    result = {
+        "query": "Computer Science",
+        "status": {"@code": "200", "text": "OK"},
+        "time": {"@unit": "msecs", "text": "12.34"},
+        "completions": {"@total": "1", "c": {"@sc": "1000", "text": "science"}},
+        "hits": {"@total": "2500", "@computed": "2500", "@sent": str(len(hits)), "@first": "0"},
+    }
+    if with_hits:
+        result["hits"]["hit"] = hits
+    return json.dumps({"result": result}, indent=4)
+
+
+def hit(i):
+    return {
+        "@score": str(i),
+        "@id": str(1000 + i),
+        "info": {
+            "title": f"A \"quoted\" title, with \\ and é中 {i}",
+            "year": 1999 + i,
+            "weight": -12.5e-3 * (i + 1),
+            "big": 12345678901234567890 + i,
+            "ratio": 0.5 if i % 2 else 1e10,
+            "flags": [True, False, None],
+            "authors": {"author": [{"@pid": f"p/{i}", "text": "José López"}]},
+        },
+    }
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 7, 64])
+def test_hits_survive_any_chunk_boundary(read_size):
+    hits = [hit(i) for i in range(12)]
+    document = dblp_response(hits)
+    stream = JsonStream(io.StringIO(document), read_size=read_size)
+    assert list(iter_json_array(stream, HITS_PATH)) == json.loads(document)["result"]["hits"]["hit"]
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 7])
+def test_numbers_cut_at_the_end_of_a_chunk(read_size):
+    values = [7, 12, -3, 1.5, 0.25, 1e5, -2.5E-7, 123456789012, 10, 0]
+    document = json.dumps(values)
+    for offset in range(read_size):
+        stream = JsonStream(io.StringIO(" " * offset + document), read_size=read_size)
+        assert list(iter_json_array(stream, ())) == values
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 7])
+def test_empty_and_missing_hit_lists(read_size):
+    empty = JsonStream(io.StringIO(dblp_response([])), read_size=read_size)
+    assert list(iter_json_array(empty, HITS_PATH)) == []
+    missing = JsonStream(io.StringIO(dblp_response([], with_hits=False)), read_size=read_size)
+    assert list(iter_json_array(missing, HITS_PATH)) == []
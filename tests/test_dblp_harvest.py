@@ -0,0 +1,42 @@
+import pytest
+
+from dblp_harvest import CacheMissError, ResponseCache, harvest
+
+from dblp_stand_in import StandInServer
+
+
+def test_pages_arrive_in_offset_order_until_the_last_result():
+    with StandInServer(total=2345) as server:
+        pages = list(harvest("graph", 10000, page_size=500, max_workers=4, url=server.url))
+    keys = [hit["info"]["key"] for page in pages for hit in page]
+    assert keys == [f"rec/{i}" for i in range(2345)]
+    assert sorted(server.requests) == list(range(0, 2500, 500))
+    assert server.max_open <= 4
+
+
+def test_harvest_reads_ahead_only_a_bounded_number_of_pages():
+    with StandInServer(total=150000) as server:
+        hits = 0
+        for page in harvest("graph", 120000, page_size=1000, max_workers=4, url=server.url):
+            hits += len(page)
+            # Pages are streamed: at most max_workers pages beyond the ones handed back are ever requested
+            assert len(server.requests) <= hits // 1000 + 4
+    assert hits == 120000
+    assert len(server.requests) == 120
+
+
+def test_recorded_pages_replay_without_the_network(tmp_path):
+    with StandInServer(total=1200) as server:
+        recorded = list(harvest("graph", 5000, page_size=500, url=server.url,
+                                cache=ResponseCache(str(tmp_path), "record")))
+    # The server is gone and the URL is unreachable: every page must come from the cache
+    replayed = list(harvest("graph", 5000, page_size=500, url="http://127.0.0.1:9/none",
+                            cache=ResponseCache(str(tmp_path), "replay")))
+    assert replayed == recorded
+    assert sum(len(page) for page in replayed) == 1200
+
+
+def test_replay_reports_pages_that_were_never_recorded(tmp_path):
+    with pytest.raises(CacheMissError):
+        list(harvest("graph", 500, page_size=500, url="http://127.0.0.1:9/none",
+                     cache=ResponseCache(str(tmp_path), "replay")))
@@ -0,0 +1,109 @@
+import random
+
+from corpus_io import iter_papers, write_papers
+from enrichment import (
+    AuthorResolver, CitationSampler, author_names, changed_papers, enrich_corpus, merge_delta, previous_hashes,
+    tag_changes,
+)
+
+from dblp_stand_in import fixture_hit
+
+
+def paper(key, authors):
+    return {"@id": key, "info": {"key": key, "title": key, "type": "Journal Articles", "authors": {"author": authors}}}
+
+
+def as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+def test_reviewers_exclude_own_authors_by_pid():
+    papers = [
+        paper("k/0", [{"@pid": "a/1", "text": "Ann Lee"}]),
+        paper("k/1", [{"text": "Ann Lee"}, {"@pid": "b/1", "text": "Bo"}]),
+        paper("k/2", [{"@pid": "c/1", "text": "C"}, {"@pid": "d/1", "text": "D"}]),
+    ]
+    for enriched in enrich_corpus(papers):
+        info = enriched["info"]
+        own = {author["@pid"] for author in as_list(info["authors"]["author"])}
+        reviewers = {reviewer["@pid"] for reviewer in as_list(info["reviewers"]["author"])}
+        assert reviewers and not own & reviewers
+
+
+def test_hashed_ids_survive_a_new_harvest(tmp_path):
+    day1 = [paper("k/5", [{"text": "X"}, {"text": "Y"}])]
+    previous = tmp_path / "dblp.ndjson"
+    write_papers(enrich_corpus(day1), str(previous))
+
+    day2 = [paper("k/1", [{"text": "X"}, {"text": "Y"}, {"text": "Z"}])] + day1
+    resolver = AuthorResolver(day2, iter_papers(str(previous)))
+
+    assert resolver.resolved[1] == AuthorResolver(day1).resolved[0]
+    assert resolver.resolved[0][:2] == resolver.resolved[1]
+
+
+def test_citations_never_share_an_author_with_the_citing_paper():
+    # One prolific author on most of the corpus, a few papers by others
+    papers = [{"info": {"authors": {"author": [{"text": "Prolific"}, {"text": f"Student {i}"}]}}} for i in range(200)]
+    papers += [{"info": {"authors": {"author": {"text": f"Other {i}"}}}} for i in range(3)]
+    sampler = CitationSampler(papers, [f"id{i}" for i in range(len(papers))])
+    rng = random.Random(1)
+    for index in (0, 150, 201):
+        names = author_names(papers[index]["info"])
+        cited = sampler.sample(index, names, 5, rng=rng)
+        assert 1 <= len(cited) <= 5 and len(set(cited)) == len(cited)
+        for paper_id in cited:
+            assert paper_id != f"id{index}"
+            assert not names & author_names(papers[int(paper_id[2:])]["info"])
+    # Only the three outside papers are eligible for the prolific author's papers
+    assert set(sampler.sample(0, {"Prolific", "Student 0"}, 5, rng=random.Random(4))) <= {"id200", "id201", "id202"}
+
+
+def harvest(count):
+    hits = [fixture_hit(i) for i in range(count)]
+    # Every third author has no DBLP pid and gets a hashed id
+    for i, hit in enumerate(hits):
+        if i % 3 == 0:
+            hit["info"]["authors"]["author"][0].pop("@pid")
+    return hits
+
+
+def test_delta_enriches_only_new_and_changed_papers(tmp_path):
+    previous, delta, merged = (str(tmp_path / name) for name in ("day1.ndjson", "delta.ndjson", "day2.ndjson"))
+    write_papers(enrich_corpus(harvest(60)), previous)
+    before = {paper["info"]["key"]: paper for paper in iter_papers(previous)}
+    assert any(author["@pid"].startswith("h/") for author in as_list(before["rec/9"]["info"]["authors"]["author"]))
+
+    papers = harvest(61)
+    papers[9]["info"]["title"] = "A corrected title"
+    changes = changed_papers(papers, previous_hashes(previous))
+    assert changes == {9: "changed", 60: "new"}
+
+    indices = sorted(changes)
+    write_papers(tag_changes(enrich_corpus(papers, indices=indices, previous=previous), indices, changes), delta)
+    assert [(paper["info"]["key"], paper["@delta"]) for paper in iter_papers(delta)] == [
+        ("rec/9", "changed"), ("rec/60", "new"),
+    ]
+
+    merge_delta(previous, delta, merged)
+    after = [paper for paper in iter_papers(merged)]
+    keys = [paper["info"]["key"] for paper in after]
+    assert len(keys) == len(set(keys)) == 61
+    assert all("@delta" not in paper for paper in after)
+    for paper in after:
+        key = paper["info"]["key"]
+        if key == "rec/60":
+            continue
+        old = before[key]["info"]
+        assert paper["info"]["paperid"] == old["paperid"]
+        assert as_list(paper["info"]["authors"]["author"]) == as_list(old["authors"]["author"])
+        if key != "rec/9":
+            assert paper == before[key]
+    assert next(paper for paper in after if paper["info"]["key"] == "rec/9")["info"]["title"] == "A corrected title"
+
+
+def test_output_is_identical_for_any_workers_and_shard_size():
+    papers = harvest(500)
+    single = list(enrich_corpus(papers, workers=1))
+    assert list(enrich_corpus(papers, workers=3, shard_size=37)) == single
+    assert list(enrich_corpus(papers, workers=1, shard_size=1)) == single
@@ -0,0 +1,177 @@
+import os
+import re
+
+import pytest
+
+import graph_loader
+from graph_loader import (
+    PAPER_EXISTS_QUERY, PARALLEL_LOCK_ORDER, Checkpoint, LoadStats, Quarantine, load_papers, run_id,
+)
+from query_cache import BUMP_STATEMENT
+from synthetic_corpus import generate_papers
+
+from neo4j_stand_in import Driver, server_error
+
+
+def test_run_id_changes_with_the_input(tmp_path):
+    path = tmp_path / "dblp.ndjson"
+    path.write_text("{}\n")
+    first = run_id(str(path), ["core"])
+    path.write_text("{}\n{}\n")
+    assert run_id(str(path), ["core"]) != first
+
+
+def test_parallel_load_refuses_a_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"), "run")
+    with pytest.raises(ValueError):
+        load_papers(Driver(), generate_papers(10), 5, workers=2, checkpoint=checkpoint)
+
+
+def test_parallel_load_refuses_a_graph_with_papers():
+    driver = Driver(results={PAPER_EXISTS_QUERY: [{"id": "p"}]})
+    with pytest.raises(ValueError):
+        load_papers(driver, generate_papers(10), 5, workers=2)
+    assert not driver.statements("UNWIND")
+
+
+def test_parallel_batches_lock_shared_nodes_in_one_order():
+    driver = Driver()
+    load_papers(driver, generate_papers(200), 50, workers=3, stats=LoadStats("test"))
+    statements = graph_loader.stage_statements(graph_loader.STAGES, workers=3)
+    for statement in [statement for _, statement in statements] + [graph_loader.PARALLEL_CITES_STATEMENT]:
+        assert not re.search(r"MERGE \([^)]*\)-\[", statement)
+
+    # Authors and reviewers go through a single statement, sorted by author id
+    kinds = dict(statements)
+    assert "written_by" not in kinds and "reviewed_by" not in kinds
+    authorships = driver.statements(kinds["authors"])
+    assert {row["reviewer"] for parameters in authorships for row in parameters["rows"]} == {True, False}
+    for kind, key in PARALLEL_LOCK_ORDER:
+        for parameters in driver.statements(kinds[kind]):
+            ids = [str(row[key]) for row in parameters["rows"]]
+            assert ids == sorted(ids)
+
+
+def test_quarantined_papers_are_not_counted(tmp_path, capsys):
+    papers = list(generate_papers(50))
+    bad = papers[7]["info"]["paperid"]
+
+    def fail(statement, parameters):
+        if "MERGE (p:Paper" in statement and any(row.get("paperid") == bad for row in parameters.get("rows", [])):
+            raise server_error("bad record")
+
+    quarantine = Quarantine(str(tmp_path / "quarantine.ndjson"))
+    loaded = load_papers(Driver(fail=fail), papers, 10, stats=LoadStats("test"), quarantine=quarantine)
+    assert loaded == 49
+    assert quarantine.count == 1
+    assert "citations were quarantined" in capsys.readouterr().out
+
+
+def test_malformed_records_are_quarantined(tmp_path):
+    papers = list(generate_papers(30))
+    papers[4]["info"]["authors"]["author"] = "Jane Doe"
+    papers[12]["info"]["cited"] = 5
+    quarantine = Quarantine(str(tmp_path / "quarantine.ndjson"))
+    driver = Driver()
+    loaded = load_papers(driver, papers, 10, stats=LoadStats("test"), quarantine=quarantine)
+    assert loaded == 28
+    assert quarantine.count == 2
+    written = {row["paperid"] for rows in driver.statements("MERGE (p:Paper") for row in rows["rows"]}
+    assert len(written) == 28 and papers[4]["info"]["paperid"] not in written
+
+
+def test_bisected_parallel_batches_write_each_affiliation_once(tmp_path):
+    papers = list(generate_papers(80))
+    bad = papers[21]["info"]["paperid"]
+
+    def fail(statement, parameters):
+        if "MERGE (p:Paper" in statement and any(row.get("paperid") == bad for row in parameters.get("rows", [])):
+            raise server_error("bad record")
+
+    driver = Driver(fail=fail)
+    quarantine = Quarantine(str(tmp_path / "quarantine.ndjson"))
+    load_papers(driver, papers, 20, workers=2, stats=LoadStats("test"), quarantine=quarantine)
+    statement = dict(graph_loader.PARALLEL_AFFILIATION_STATEMENTS)["affiliations"]
+    authors = [row["author_id"] for parameters in driver.statements(statement) for row in parameters["rows"]]
+    assert len(authors) == len(set(authors))
+
+
+def test_errors_that_are_not_data_errors_stop_the_load(tmp_path):
+    def fail(statement, parameters):
+        if "MERGE (p:Paper" in statement:
+            raise server_error("no such database", "Neo.ClientError.Database.DatabaseNotFound")
+
+    quarantine = Quarantine(str(tmp_path / "quarantine.ndjson"))
+    driver = Driver(fail=fail)
+    with pytest.raises(Exception, match="no such database"):
+        load_papers(driver, generate_papers(20), 10, stats=LoadStats("test"), quarantine=quarantine)
+    assert quarantine.count == 0 and driver.transactions == 0
+
+
+def test_resume_skips_committed_papers(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_loader, "BACKOFF", 0)
+    papers = list(generate_papers(60))
+    path = str(tmp_path / "checkpoint.json")
+
+    class Crash(Exception):
+        pass
+
+    def crash(statement, parameters):
+        rows = parameters.get("rows", [])
+        if "MERGE (p:Paper" in statement and any(row.get("paperid") == papers[35]["info"]["paperid"] for row in rows):
+            raise Crash()
+
+    with pytest.raises(Crash):
+        load_papers(Driver(fail=crash), papers, 10, checkpoint=Checkpoint(path, "run"))
+    assert Checkpoint(path, "run").get("papers") == 30
+
+    driver = Driver()
+    load_papers(driver, papers, 10, checkpoint=Checkpoint(path, "run"))
+    written = [row["paperid"] for rows in driver.statements("MERGE (p:Paper") for row in rows["rows"]]
+    assert written == [paper["info"]["paperid"] for paper in papers[30:]]
+    assert not os.path.exists(path)
+
+
+def test_sequential_batches_bump_the_version_in_their_transaction():
+    driver = Driver()
+    load_papers(driver, generate_papers(50), 10, stats=LoadStats("test"))
+    assert BUMP_STATEMENT not in driver.autocommit
+    # 5 paper batches and 1 citation batch, each with its bump
+    assert len(driver.statements(BUMP_STATEMENT)) == driver.transactions == 6
+
+
+def test_parallel_load_bumps_the_version_once_at_the_end():
+    driver = Driver()
+    load_papers(driver, generate_papers(50), 10, workers=2, stats=LoadStats("test"))
+    assert len(driver.statements(BUMP_STATEMENT)) == 1
+    assert driver.autocommit[-1] == BUMP_STATEMENT
+
+
+def test_delta_rolls_back_the_counters_of_a_changed_paper():
+    papers = list(generate_papers(20))
+    changed = papers[3]
+    changed["@delta"] = "changed"
+    changed["info"]["cited"] = [papers[0]["info"]["paperid"], papers[1]["info"]["paperid"]]
+    driver = Driver()
+    load_papers(driver, papers[3:6], 10, stats=LoadStats("test"))
+
+    statements = dict(graph_loader.CORE_STATEMENTS)
+    # The stale rollback only gets the changed paper, and runs before the paper is written again
+    assert driver.statements(statements["stale"]) == [{"rows": [{"paperid": changed["info"]["paperid"]}]}]
+    order = [statement for statement, _ in driver.log]
+    assert order.index(statements["stale"]) < order.index(statements["papers"])
+    for decrement in ["q.citationCount = q.citationCount - 1", "v.citationCount = v.citationCount - 1",
+                      "v.paperCount = v.paperCount - 1", "p.referenceCount = 0"]:
+        assert decrement in statements["stale"]
+
+    # Every paper gets its counters, and the new citations increase them
+    assert "p.citationCount = coalesce(p.citationCount, 0)" in statements["papers"]
+    assert "p.referenceCount = coalesce(p.referenceCount, 0)" in statements["papers"]
+    assert "coalesce" not in dict(graph_loader.PARALLEL_STATEMENTS)["papers"]
+    cites = [row for parameters in driver.statements(graph_loader.CITES_STATEMENT) for row in parameters["rows"]]
+    assert [row for row in cites if row["paperid"] == changed["info"]["paperid"]] == [
+        {"paperid": changed["info"]["paperid"], "cited_id": cited} for cited in changed["info"]["cited"]
+    ]
+    assert sorted(row["paperid"] for row in cites) == sorted(
+        paper["info"]["paperid"] for paper in papers[3:6] for _ in paper["info"]["cited"]
+    )
@@ -0,0 +1,95 @@
+import os
+
+from query_cache import BUMP_STATEMENT, VERSION_QUERY, QueryCache
+
+
+class Record(dict):
+    def data(self):
+        return dict(self)
+
+
+class Result(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return self
+
+
+class Session:
+    """A graph version node and a count of the queries that reach the database."""
+
+    def __init__(self, token="a"):
+        self.token = token
+        self.version = None
+        self.runs = 0
+
+    def execute_write(self, fn):
+        return fn(self)
+
+    def run(self, query, **params):
+        if query == VERSION_QUERY:
+            return Result([Record(token=self.token if self.version else None, version=self.version)])
+        if query == BUMP_STATEMENT:
+            self.version = (self.version or 0) + 1
+            return Result()
+        self.runs += 1
+        return Result([Record(value=params.get("value", 0), runs=self.runs)])
+
+
+def test_hits_until_the_graph_changes():
+    session = Session()
+    session.run(BUMP_STATEMENT)
+    cache = QueryCache()
+    first = cache.run(session, "MATCH (p:Paper) RETURN p.title", value=1)
+    assert cache.run(session, "MATCH (p:Paper)\n  RETURN p.title", value=1) == first
+    assert session.runs == 1
+
+    session.run(BUMP_STATEMENT)
+    cache.run(session, "MATCH (p:Paper) RETURN p.title", value=1)
+    assert session.runs == 2
+
+
+def test_write_queries_bump_the_version():
+    session = Session()
+    session.run(BUMP_STATEMENT)
+    cache = QueryCache()
+    cache.run(session, "MATCH (a:Author) SET a:Guru RETURN a.name")
+    cache.run(session, "MATCH (a:Author) SET a:Guru RETURN a.name")
+    assert session.runs == 2
+    assert session.version == 3
+
+
+def test_disk_entries_are_scoped_to_the_database(tmp_path):
+    session = Session(token="a")
+    session.run(BUMP_STATEMENT)
+    QueryCache(directory=str(tmp_path)).run(session, "MATCH (n) RETURN count(n)")
+    assert QueryCache(directory=str(tmp_path)).run(session, "MATCH (n) RETURN count(n)")[0]["runs"] == 1
+
+    other = Session(token="b")
+    other.run(BUMP_STATEMENT)
+    QueryCache(directory=str(tmp_path)).run(other, "MATCH (n) RETURN count(n)")
+    assert other.runs == 1
+
+
+def test_unversioned_graphs_are_not_cached():
+    session = Session()
+    cache = QueryCache()
+    cache.run(session, "MATCH (n) RETURN count(n)")
+    cache.run(session, "MATCH (n) RETURN count(n)")
+    assert session.runs == 2
+
+
+def test_disk_entries_of_older_versions_are_removed(tmp_path):
+    session = Session(token="a")
+    session.run(BUMP_STATEMENT)
+    other = Session(token="b")
+    other.run(BUMP_STATEMENT)
+    cache = QueryCache(directory=str(tmp_path))
+    cache.run(session, "MATCH (n) RETURN count(n)")
+    cache.run(other, "MATCH (n) RETURN count(n)")
+    assert sorted(os.listdir(tmp_path)) == ["a-1", "b-1"]
+
+    session.run(BUMP_STATEMENT)
+    cache.run(session, "MATCH (n) RETURN count(n)")
+    assert sorted(os.listdir(tmp_path)) == ["a-2", "b-1"]